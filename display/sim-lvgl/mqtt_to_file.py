@@ -7,12 +7,18 @@ that the LVGL simulator can read using its existing JSON loader.
 """
 
 import json
-import time
+import os
 import signal
 import sys
+import threading
 from pathlib import Path
 import paho.mqtt.client as mqtt
 
+try:
+    import orjson  # optional: faster parse/serialize on the message hot path
+except ImportError:
+    orjson = None
+
 # MQTT Configuration (matches your .env)
 MQTT_HOST = "192.168.2.244"
 MQTT_PORT = 1883
@@ -24,13 +30,13 @@ MQTT_TOPIC = "airtracker/nearest"
 OUTPUT_FILE = "sim_data.json"
 
 # Global state
-running = True
+STOP = threading.Event()
 last_data = None
+_last_bytes = None
 
 def signal_handler(sig, frame):
-    global running
     print("Shutting down MQTT bridge...")
-    running = False
+    STOP.set()
 
 def on_connect(client, userdata, flags, rc):
     if rc == 0:
@@ -44,10 +50,13 @@ def on_disconnect(client, userdata, rc):
     print("Disconnected from MQTT broker")
 
 def on_message(client, userdata, msg):
-    global last_data
+    global last_data, _last_bytes
     try:
         # Parse the MQTT message
-        data = json.loads(msg.payload.decode('utf-8'))
+        if orjson is not None:
+            data = orjson.loads(msg.payload)
+        else:
+            data = json.loads(msg.payload.decode('utf-8'))
 
         # Keep original MQTT format for the JSON loader to parse correctly
         sim_data = data.copy()  # Start with original data
@@ -69,9 +78,19 @@ def on_message(client, userdata, msg):
 
         last_data = sim_data
 
-        # Write to file
-        with open(OUTPUT_FILE, 'w') as f:
-            json.dump(sim_data, f, indent=2)
+        # Heartbeats often repeat the same state; skip the write if nothing changed
+        if orjson is not None:
+            payload_bytes = orjson.dumps(sim_data, option=orjson.OPT_INDENT_2)
+        else:
+            payload_bytes = json.dumps(sim_data, indent=2).encode('utf-8')
+        if payload_bytes == _last_bytes:
+            return
+
+        # Write via temp file + rename so the simulator never reads a torn file
+        tmp = OUTPUT_FILE + '.tmp'
+        Path(tmp).write_bytes(payload_bytes)
+        os.replace(tmp, OUTPUT_FILE)
+        _last_bytes = payload_bytes
 
         print(f"Updated {OUTPUT_FILE} - {sim_data['callsign']} from {sim_data['route_origin']} to {sim_data['route_destination']}")
 
@@ -103,8 +122,6 @@ def format_eta(eta_min):
     return f"{hours:02d}:{minutes:02d}"
 
 def main():
-    global running
-
     print("AirTracker MQTT to File Bridge")
     print(f"Will write live data to: {OUTPUT_FILE}")
     print("Use this file with: SIM_JSON_PATH=sim_data.json ./airtracker_sim")
@@ -128,9 +145,8 @@ def main():
         # Start the loop
         client.loop_start()
 
-        # Keep running until interrupted
-        while running:
-            time.sleep(1)
+        # Sleep until SIGINT/SIGTERM sets the stop event
+        STOP.wait()
 
     except Exception as e:
         print(f"MQTT error: {e}")
@@ -3,6 +3,7 @@ import os
 import json
 import signal
 import sys
+import threading
 from pathlib import Path
 
 try:
@@ -11,6 +12,11 @@ except ImportError:
     print("Please install paho-mqtt: pip install paho-mqtt", file=sys.stderr)
     sys.exit(1)
 
+try:
+    import orjson  # optional: parses/emits UTF-8 bytes directly
+except ImportError:
+    orjson = None
+
 
 BROKER = os.getenv("MQTT_HOST", "127.0.0.1")
 PORT = int(os.getenv("MQTT_PORT", "1883"))
@@ -18,31 +24,67 @@ TOPIC = os.getenv("NEAREST_TOPIC", "airtracker/nearest")
 USERNAME = os.getenv("MQTT_USERNAME", "")
 PASSWORD = os.getenv("MQTT_PASSWORD", "")
 OUT_PATH = Path(os.getenv("SIM_JSON_PATH", "display/sim-lvgl/data/nearest.json"))
+TMP_PATH = OUT_PATH.with_name(OUT_PATH.name + ".tmp")
+
+
+# Only the newest message matters to the sim, so on_message just parks it here
+# and the writer thread coalesces bursts instead of blocking the network loop.
+_latest = None
+_latest_lock = threading.Lock()
+_pending = threading.Event()
 
 
 def on_connect(client, userdata, flags, rc):
     print(f"Connected to MQTT {BROKER}:{PORT} rc={rc}")
-    client.subscribe(TOPIC)
+    client.subscribe(TOPIC, qos=0)
     print(f"Subscribed to {TOPIC}")
 
 
 def on_message(client, userdata, msg):
+    global _latest
+    with _latest_lock:
+        _latest = (msg.topic, msg.payload)
+    _pending.set()
+
+
+def write_payload(topic, payload):
     try:
-        payload = msg.payload.decode("utf-8")
-        obj = json.loads(payload)
+        if orjson is not None:
+            obj = orjson.loads(payload)
+        else:
+            obj = json.loads(payload.decode("utf-8"))
     except Exception as e:
-        print(f"Bad JSON on {msg.topic}: {e}")
+        print(f"Bad JSON on {topic}: {e}")
         return
     try:
-        OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with OUT_PATH.open("w") as f:
-            json.dump(obj, f, ensure_ascii=False)
+        if orjson is not None:
+            buf = orjson.dumps(obj)
+        else:
+            buf = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        # Write a temp file and rename it over the target so the sim never sees a
+        # half-written file. No fsync: readers only need atomicity, not durability.
+        fd = os.open(TMP_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, buf)
+        finally:
+            os.close(fd)
+        os.replace(TMP_PATH, OUT_PATH)
         print(f"Wrote {OUT_PATH} ({len(payload)} bytes)")
     except Exception as e:
         print(f"Write error: {e}")
 
 
+def writer_loop():
+    while True:
+        _pending.wait()
+        with _latest_lock:
+            topic, payload = _latest
+            _pending.clear()
+        write_payload(topic, payload)
+
+
 def main():
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
     client = mqtt.Client()
     if USERNAME:
         client.username_pw_set(USERNAME, PASSWORD)
@@ -52,7 +94,12 @@ def main():
     # Graceful shutdown
     signal.signal(signal.SIGINT, lambda s, f: sys.exit(0))
     signal.signal(signal.SIGTERM, lambda s, f: sys.exit(0))
-    client.loop_forever()
+    # Network loop on paho's thread; JSON and disk I/O on this one
+    client.loop_start()
+    try:
+        writer_loop()
+    finally:
+        client.loop_stop()
 
 
 if __name__ == "__main__":
@@ -3,47 +3,50 @@
 Detailed test showing input and output data structures
 """
 import json
+import logging
 from image_processor import ImageProcessor
 
+logger = logging.getLogger(__name__)
+
 def detailed_test():
-    print("📊 AIRCRAFT IMAGE PROCESSING - DETAILED INPUT/OUTPUT")
-    print("=" * 60)
+    logger.info("📊 AIRCRAFT IMAGE PROCESSING - DETAILED INPUT/OUTPUT")
+    logger.info("=" * 60)
 
     # Input data
     input_url = "https://cdn.jetphotos.com/full/5/367779_1758341530.jpg"
-    print(f"📥 INPUT:")
-    print(f"   Original URL: {input_url}")
-    print(f"   Expected format: JPEG image from JetPhotos")
-    print(f"   Target conversion: 96x72 24-bit BMP")
-    print(f"   Target storage: Zipline aircraft folder")
-    print()
+    logger.info("📥 INPUT:")
+    logger.info("   Original URL: %s", input_url)
+    logger.info("   Expected format: JPEG image from JetPhotos")
+    logger.info("   Target conversion: 96x72 24-bit BMP")
+    logger.info("   Target storage: Zipline aircraft folder")
+    logger.info("")
 
     # Process the image
     processor = ImageProcessor(use_memory_only=True)
     result_url = processor.process_image(input_url)
 
     if result_url:
-        print(f"📤 OUTPUT:")
-        print(f"   Zipline URL: {result_url}")
+        logger.info("📤 OUTPUT:")
+        logger.info("   Zipline URL: %s", result_url)
 
         # Show the stored data structure
         stored_data = processor.processed_images.get(input_url)
         if stored_data:
-            print(f"   Stored data structure:")
-            print(json.dumps(stored_data, indent=4))
+            logger.info("   Stored data structure:")
+            logger.info("%s", json.dumps(stored_data, indent=4))
 
-        print()
-        print(f"🔄 PROCESSING PIPELINE SUMMARY:")
-        print(f"   1. Downloaded: JPEG from JetPhotos")
-        print(f"   2. Converted: To 96x72 24-bit BMP")
-        print(f"   3. Uploaded: To Zipline aircraft folder")
-        print(f"   4. Stored: URL and metadata in memory")
-        print(f"   5. Cleaned: Temporary files removed")
+        logger.info("")
+        logger.info("🔄 PROCESSING PIPELINE SUMMARY:")
+        logger.info("   1. Downloaded: JPEG from JetPhotos")
+        logger.info("   2. Converted: To 96x72 24-bit BMP")
+        logger.info("   3. Uploaded: To Zipline aircraft folder")
+        logger.info("   4. Stored: URL and metadata in memory")
 
         return True
     else:
-        print("❌ Processing failed")
+        logger.warning("❌ Processing failed")
         return False
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     detailed_test()
\ No newline at end of file
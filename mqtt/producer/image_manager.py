@@ -17,41 +17,76 @@ Usage:
 """
 
 import argparse
+import heapq
 import json
-import os
 import sys
+import threading
+from collections import Counter, OrderedDict
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, List, Optional
 
+try:
+    import orjson  # optional: faster cache load
+except ImportError:
+    orjson = None
+
 # Import the global cache from image_processor
 try:
-    from image_processor import _processed_images_cache
+    from image_processor import (MAX_CACHE, _processed_images_cache, _processed_images_lock,
+                                 _processed_urls_lower, _merge_processed)
 except ImportError:
-    _processed_images_cache = {}
+    # image_processor needs Pillow; keep the same bounded LRU without it
+    MAX_CACHE = 4096
+    _processed_images_cache = OrderedDict()
+    _processed_images_lock = threading.RLock()
+    _processed_urls_lower = {}
+
+    def _merge_processed(entries: Dict):
+        _processed_images_cache.update(entries)
+        _processed_urls_lower.update((url, url.lower()) for url in entries)
+        while len(_processed_images_cache) > MAX_CACHE:
+            url, _ = _processed_images_cache.popitem(last=False)
+            _processed_urls_lower.pop(url, None)
 
 
 def get_processed_url(original_url: str) -> Optional[str]:
     """Get Zipline URL for an original image URL from in-memory cache."""
-    entry = _processed_images_cache.get(original_url)
-    return entry['zipline_url'] if entry else None
+    with _processed_images_lock:
+        entry = _processed_images_cache.get(original_url)
+        if entry is None:
+            return None
+        _processed_images_cache.move_to_end(original_url)  # record recency for LRU eviction
+    return entry['zipline_url']
 
 
 def list_processed_images() -> Dict:
     """Get all processed images from in-memory cache."""
-    return _processed_images_cache.copy()
+    with _processed_images_lock:
+        return _processed_images_cache.copy()
+
+
+@lru_cache(maxsize=None)
+def _parse_processed_date(date_str: str) -> Optional[datetime]:
+    """Parse a stored processed_date once; entries never change after insert."""
+    try:
+        return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def _processed_date_key(item) -> str:
+    return item[1].get('processed_date', '')
 
 
 def get_latest_processed(count: int = 10) -> List[Dict]:
     """Get the latest N processed images from in-memory cache."""
-    # Sort by processed_date
-    sorted_items = sorted(
-        _processed_images_cache.items(),
-        key=lambda x: x[1].get('processed_date', ''),
-        reverse=True
-    )
+    # Partial sort by processed_date; only the top N are ever ordered
+    with _processed_images_lock:
+        latest_items = heapq.nlargest(count, _processed_images_cache.items(), key=_processed_date_key)
 
     results = []
-    for original_url, data in sorted_items[:count]:
+    for original_url, data in latest_items:
         results.append({
             'original_url': original_url,
             'zipline_url': data['zipline_url'],
@@ -65,16 +100,28 @@ def get_latest_processed(count: int = 10) -> List[Dict]:
 
 def search_processed_images(pattern: str) -> List[Dict]:
     """Search for images by URL pattern in in-memory cache."""
-    results = []
-    pattern_lower = pattern.lower()
-
-    for original_url, data in _processed_images_cache.items():
-        if pattern_lower in original_url.lower():
-            results.append({
-                'original_url': original_url,
+    with _processed_images_lock:
+        # Exact original URL: direct dict probe
+        data = _processed_images_cache.get(pattern)
+        if data is not None:
+            return [{
+                'original_url': pattern,
                 'zipline_url': data['zipline_url'],
                 'processed_date': data['processed_date']
-            })
+            }]
+
+        results = []
+        pattern_lower = pattern.lower()
+
+        # Substring match against the precomputed lowercase index
+        for original_url, url_lower in _processed_urls_lower.items():
+            if pattern_lower in url_lower:
+                data = _processed_images_cache[original_url]
+                results.append({
+                    'original_url': original_url,
+                    'zipline_url': data['zipline_url'],
+                    'processed_date': data['processed_date']
+                })
 
     return results
 
@@ -82,7 +129,7 @@ def search_processed_images(pattern: str) -> List[Dict]:
 class ImageManager:
     """Manages access to processed images - wrapper for backward compatibility."""
 
-    def __init__(self, processed_file: str = "data/processed_images.json"):
+    def __init__(self, processed_file: str = "data/processed_images.jsonl"):
         self.processed_file = processed_file
 
     def get_zipline_url(self, original_url: str) -> Optional[str]:
@@ -102,32 +149,54 @@ class ImageManager:
         return search_processed_images(pattern)
 
     def load_from_json(self) -> Dict:
-        """Load processed images from JSON file into memory cache."""
-        if os.path.exists(self.processed_file):
+        """Load processed images from the JSONL log (or legacy JSON file) into memory cache."""
+        paths = [self.processed_file]
+        if self.processed_file.endswith('.jsonl'):
+            paths.append(self.processed_file[:-1])  # legacy processed_images.json snapshot
+        loads = orjson.loads if orjson is not None else json.loads
+
+        for path in paths:
+            # EAFP: open directly instead of stat-then-open
             try:
-                with open(self.processed_file, 'r') as f:
-                    data = json.load(f)
-                    _processed_images_cache.update(data)
-                    print(f"📂 Loaded {len(data)} images from {self.processed_file} into memory")
-                    return data
-            except (json.JSONDecodeError, IOError) as e:
+                with open(path, 'rb') as f:
+                    if path.endswith('.jsonl'):
+                        data = {}
+                        for line in f:
+                            if line.strip():
+                                record = loads(line)
+                                data[record.pop('url')] = record
+                    else:
+                        data = loads(f.read())
+            except FileNotFoundError:
+                continue
+            except (ValueError, KeyError, IOError) as e:
                 print(f"❌ Error loading processed images: {e}")
                 return {}
+            with _processed_images_lock:
+                _merge_processed(data)
+            print(f"📂 Loaded {len(data)} images from {path} into memory")
+            return data
         return {}
 
     def export_urls(self, output_file: str, url_type: str = 'cloudinary') -> int:
         """Export URLs to a text file."""
         try:
-            with open(output_file, 'w') as f:
-                count = 0
-                for original_url, data in _processed_images_cache.items():
-                    if url_type == 'zipline':
-                        f.write(f"{data['zipline_url']}\n")
-                    elif url_type == 'original':
-                        f.write(f"{original_url}\n")
-                    elif url_type == 'both':
-                        f.write(f"{original_url} -> {data['zipline_url']}\n")
-                    count += 1
+            # Join everything into one newline-delimited payload and write it once
+            with _processed_images_lock:
+                items = list(_processed_images_cache.items())
+            if url_type == 'zipline':
+                lines = [data['zipline_url'] for _, data in items]
+            elif url_type == 'original':
+                lines = [original_url for original_url, _ in items]
+            elif url_type == 'both':
+                lines = [f"{original_url} -> {data['zipline_url']}" for original_url, data in items]
+            else:
+                lines = []
+            count = len(items)
+            payload = ('\n'.join(lines) + '\n').encode() if lines else b''
+
+            with open(output_file, 'wb') as f:
+                f.write(payload)
 
             print(f"✅ Exported {count} URLs to {output_file}")
             return count
@@ -138,37 +207,32 @@ class ImageManager:
 
     def get_stats(self) -> Dict:
         """Get statistics about processed images."""
-        if not _processed_images_cache:
+        with _processed_images_lock:
+            entries = list(_processed_images_cache.values())
+        if not entries:
             return {'total': 0}
 
-        # Parse dates for statistics
+        # Single pass: dates, formats and dimensions together
         dates = []
-        for data in _processed_images_cache.values():
-            try:
-                date_str = data.get('processed_date', '')
-                if date_str:
-                    dates.append(datetime.fromisoformat(date_str.replace('Z', '+00:00')))
-            except ValueError:
-                continue
-
-        stats = {
-            'total': len(_processed_images_cache),
+        formats = Counter()
+        dimensions = Counter()
+        for data in entries:
+            date_str = data.get('processed_date', '')
+            if date_str:
+                dt = _parse_processed_date(date_str)
+                if dt is not None:
+                    dates.append(dt)
+            formats[data.get('format', 'unknown')] += 1
+            dimensions[data.get('dimensions', 'unknown')] += 1
+
+        return {
+            'total': len(entries),
             'oldest': min(dates).isoformat() if dates else None,
             'newest': max(dates).isoformat() if dates else None,
-            'formats': {},
-            'dimensions': {}
+            'formats': dict(formats),
+            'dimensions': dict(dimensions)
         }
 
-        # Count formats and dimensions
-        for data in _processed_images_cache.values():
-            fmt = data.get('format', 'unknown')
-            dim = data.get('dimensions', 'unknown')
-
-            stats['formats'][fmt] = stats['formats'].get(fmt, 0) + 1
-            stats['dimensions'][dim] = stats['dimensions'].get(dim, 0) + 1
-
-        return stats
-
 
 def main():
     """Main CLI interface."""
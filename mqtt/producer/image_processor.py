@@ -15,11 +15,17 @@ By default, processed URLs are stored in memory. Use --save-json to persist to f
 """
 
 import argparse
+import functools
+import io
 import json
+import logging
 import os
+import re
 import sys
-import urllib.request
+import threading
 import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
@@ -27,26 +33,130 @@ from typing import Dict, List, Optional, Tuple
 try:
     from PIL import Image, ImageOps
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
     from dotenv import load_dotenv
 except ImportError as e:
     print(f"Missing required dependency: {e}")
     print("Install with: pip install Pillow requests python-dotenv")
     sys.exit(1)
 
+try:
+    import orjson  # optional: faster cache load/save
+except ImportError:
+    orjson = None
+
 # Load environment from root .env file
 root_env_path = os.path.join(os.path.dirname(__file__), '..', '..', '.env')
 if os.path.exists(root_env_path):
     load_dotenv(root_env_path)
 
+logger = logging.getLogger(__name__)
+
 # Configuration
 TARGET_WIDTH = 96
 TARGET_HEIGHT = 72
 BMP_BITS_PER_PIXEL = 24
-PROCESSED_URLS_FILE = "data/processed_images.json"
-TEMP_DIR = "data/temp_images"
-
-# Global in-memory storage for processed images
-_processed_images_cache = {}
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 8
+BATCH_WORKERS = 8
+PROCESSED_URLS_FILE = "data/processed_images.jsonl"
+LEGACY_PROCESSED_URLS_FILE = "data/processed_images.json"
+# BICUBIC is indistinguishable from LANCZOS at 96x72/24bpp and cheaper
+_RESAMPLE = Image.Resampling.BICUBIC
+_REDUCING_GAP = 2.0
+MAX_CACHE = 4096
+BMP_CACHE_MAX = 256  # ~20KB each
+
+# Set once the data directory has been created, so later processors skip the makedirs
+_DATA_DIR_READY = False
+
+# Global in-memory storage for processed images (LRU, oldest first)
+_processed_images_cache = OrderedDict()
+# Every processor shares the cache, so they share one lock for LRU reads and writes
+_processed_images_lock = threading.RLock()
+# Lowercased original URL per cache key, kept in step with the cache for search
+_processed_urls_lower = {}
+
+
+def _evict_processed():
+    """Drop least recently used entries beyond MAX_CACHE."""
+    while len(_processed_images_cache) > MAX_CACHE:
+        url, _ = _processed_images_cache.popitem(last=False)
+        _processed_urls_lower.pop(url, None)
+
+
+def _store_processed(url: str, entry: Dict):
+    """Insert one processed entry into the global cache and its search index."""
+    _processed_images_cache[url] = entry
+    _processed_images_cache.move_to_end(url)
+    _processed_urls_lower[url] = url.lower()
+    _evict_processed()
+
+
+def _merge_processed(entries: Dict):
+    """Merge loaded entries into the global cache and its search index."""
+    _processed_images_cache.update(entries)
+    _processed_urls_lower.update((url, url.lower()) for url in entries)
+    _evict_processed()
+
+
+# Converted BMP bytes plus the source's ETag/Last-Modified, for conditional re-downloads
+_bmp_cache = OrderedDict()
+_bmp_cache_lock = threading.Lock()
+
+
+def _get_cached_bmp(url: str) -> Optional[Dict]:
+    with _bmp_cache_lock:
+        cached = _bmp_cache.get(url)
+        if cached is not None:
+            _bmp_cache.move_to_end(url)
+        return cached
+
+
+def _put_cached_bmp(url: str, validators: Dict, bmp: bytes):
+    """Keep a converted BMP when the source response carried a validator."""
+    if not (validators.get('etag') or validators.get('last_modified')):
+        return
+    with _bmp_cache_lock:
+        _bmp_cache[url] = {**validators, 'bmp': bmp}
+        _bmp_cache.move_to_end(url)
+        while len(_bmp_cache) > BMP_CACHE_MAX:
+            _bmp_cache.popitem(last=False)
+
+
+_IMAGE_EXT_RE = re.compile(r'\.(jpe?g|png|bmp|gif)$', re.I)
+
+
+@functools.lru_cache(maxsize=4096)
+def _bmp_filename(url: str) -> str:
+    """Derive the uploaded BMP's base filename from the source image URL."""
+    parsed_url = urllib.parse.urlparse(url)
+    filename = os.path.basename(parsed_url.path) or "image"
+    if not _IMAGE_EXT_RE.search(filename):
+        filename += ".jpg"
+    return f"converted_{filename}".replace('.jpg', '.bmp').replace('.jpeg', '.bmp').replace('.png', '.bmp')
+
+
+def _processed_line(url: str, entry: Dict) -> bytes:
+    """Serialize one cache entry as a JSONL record."""
+    record = {'url': url, **entry}
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(record) + '\n').encode()
+
+
+def _build_multipart(filename: str, data: bytes, boundary: bytes) -> Tuple[bytes, str]:
+    """Build a single-file multipart/form-data body in one buffer; returns (body, content_type)."""
+    quoted = filename.replace('"', '%22').encode()
+    body = b''.join((
+        b'--', boundary, b'\r\n',
+        b'Content-Disposition: form-data; name="file"; filename="', quoted, b'"\r\n',
+        b'Content-Type: image/bmp\r\n\r\n',
+        data,
+        b'\r\n--', boundary, b'--\r\n',
+    ))
+    return body, f"multipart/form-data; boundary={boundary.decode()}"
 
 
 class ImageProcessor:
@@ -55,8 +165,12 @@ class ImageProcessor:
     def __init__(self, zipline_config: Optional[Dict] = None, use_memory_only: bool = True):
         """Initialize with Zipline configuration."""
         self.use_memory_only = use_memory_only
+        self._lock = _processed_images_lock  # guards cache reads/mutation and saves from batch workers
+        self._jsonl_lines = 0  # records in PROCESSED_URLS_FILE, including superseded ones
+        self._jsonl_keys = set()  # distinct URLs in PROCESSED_URLS_FILE (may exceed the LRU's MAX_CACHE)
         self.setup_directories()
         self.setup_zipline(zipline_config)
+        self.setup_session()
 
         # Use global in-memory cache by default, optionally load from file
         global _processed_images_cache
@@ -65,13 +179,18 @@ class ImageProcessor:
         if not use_memory_only:
             # Load from file and merge with memory cache
             file_data = self.load_processed_images_from_file()
-            self.processed_images.update(file_data)
+            with self._lock:
+                _merge_processed(file_data)
+                if file_data and not self._jsonl_lines:
+                    # Migrate a legacy JSON snapshot so appends build on it
+                    self.compact()
 
     def setup_directories(self):
         """Create necessary directories."""
-        os.makedirs(TEMP_DIR, exist_ok=True)
-        if not self.use_memory_only:
+        global _DATA_DIR_READY
+        if not self.use_memory_only and not _DATA_DIR_READY:
             os.makedirs(os.path.dirname(PROCESSED_URLS_FILE), exist_ok=True)
+            _DATA_DIR_READY = True
 
     def setup_zipline(self, config: Optional[Dict]):
         """Configure Zipline with provided config or environment variables."""
@@ -91,97 +210,179 @@ class ImageProcessor:
                 print("Or pass config dict to ImageProcessor()")
                 sys.exit(1)
 
+    def setup_session(self):
+        """Create a pooled HTTP session shared by downloads and uploads."""
+        # One keep-alive connection per host for the whole batch instead of a handshake per image
+        adapter = HTTPAdapter(
+            pool_connections=POOL_CONNECTIONS,
+            pool_maxsize=POOL_MAXSIZE,
+            max_retries=Retry(total=3, backoff_factor=0.3),
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
     def load_processed_images_from_file(self) -> Dict:
-        """Load previously processed images from JSON file."""
-        if os.path.exists(PROCESSED_URLS_FILE):
-            try:
-                with open(PROCESSED_URLS_FILE, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError) as e:
-                print(f"⚠️ Warning: Could not load processed images file: {e}")
-        return {}
+        """Load previously processed images from the JSONL log (or legacy JSON file)."""
+        # EAFP: open directly instead of stat-then-open
+        try:
+            data = {}
+            lines = 0
+            with open(PROCESSED_URLS_FILE, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = orjson.loads(line) if orjson is not None else json.loads(line)
+                    data[record.pop('url')] = record  # later records supersede earlier ones
+                    lines += 1
+            self._jsonl_lines = lines
+            self._jsonl_keys = set(data)
+            return data
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, IOError) as e:
+            print(f"⚠️ Warning: Could not load processed images file: {e}")
+            return {}
 
-    def save_processed_images_to_file(self):
-        """Save processed images to JSON file (only when explicitly requested)."""
-        if self.use_memory_only:
-            print("⚠️ Memory-only mode - use --save-json flag to persist to file")
-            return
+        try:
+            with open(LEGACY_PROCESSED_URLS_FILE, 'rb') as f:
+                return orjson.loads(f.read()) if orjson is not None else json.load(f)
+        except FileNotFoundError:
+            pass
+        except (ValueError, IOError) as e:
+            print(f"⚠️ Warning: Could not load processed images file: {e}")
+        return {}
 
+    def append_processed_to_file(self, url: str):
+        """Append one entry to the JSONL log; compact once superseded records pile up."""
         try:
-            os.makedirs(os.path.dirname(PROCESSED_URLS_FILE), exist_ok=True)
-            with open(PROCESSED_URLS_FILE, 'w') as f:
-                json.dump(self.processed_images, f, indent=2, sort_keys=True)
-            print(f"💾 Saved {len(self.processed_images)} processed images to {PROCESSED_URLS_FILE}")
+            with open(PROCESSED_URLS_FILE, 'ab') as f:
+                f.write(_processed_line(url, self.processed_images[url]))
+            self._jsonl_lines += 1
+            self._jsonl_keys.add(url)
         except IOError as e:
-            print(f"❌ Error saving processed images: {e}")
+            print(f"❌ Error saving processed image: {e}")
+            return
+
+        if self._jsonl_lines > 2 * len(self._jsonl_keys):
+            self.compact()
 
-    def download_image(self, url: str) -> Optional[str]:
-        """Download image from URL to temporary file."""
+    def compact(self):
+        """Atomically rewrite the JSONL log with one record per URL.
+
+        Records come from replaying the log itself (plus anything only in memory),
+        not from the LRU, so entries evicted past MAX_CACHE stay persisted.
+        """
+        tmp_path = PROCESSED_URLS_FILE + '.tmp'
         try:
-            print(f"📥 Downloading: {url}")
+            records = self.load_processed_images_from_file()
+            records.update(self.processed_images)
+            payload = b''.join(_processed_line(url, entry) for url, entry in records.items())
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, PROCESSED_URLS_FILE)
+            self._jsonl_lines = len(records)
+            self._jsonl_keys = set(records)
+        except IOError as e:
+            print(f"❌ Error compacting processed images: {e}")
 
-            # Create filename from URL
-            parsed_url = urllib.parse.urlparse(url)
-            filename = os.path.basename(parsed_url.path) or "image"
-            if not any(filename.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.bmp', '.gif']):
-                filename += ".jpg"
+    def save_processed_images_to_file(self):
+        """Save processed images to file (only when explicitly requested)."""
+        if self.use_memory_only:
+            print("⚠️ Memory-only mode - use --save-json flag to persist to file")
+            return
 
-            temp_path = os.path.join(TEMP_DIR, f"original_{filename}")
+        with self._lock:
+            self.compact()
+            count = self._jsonl_lines
+        print(f"💾 Saved {count} processed images to {PROCESSED_URLS_FILE}")
 
-            # Download with headers to avoid bot detection
-            req = urllib.request.Request(url, headers={
-                'User-Agent': 'AirTracker/1.0 (Aircraft Image Processor)'
-            })
+    def download_image(self, url: str, cached: Optional[Dict] = None) -> Tuple[Optional[io.BytesIO], Optional[Dict]]:
+        """Download image from URL into memory.
 
-            with urllib.request.urlopen(req, timeout=30) as response:
-                with open(temp_path, 'wb') as f:
-                    f.write(response.read())
+        Returns (data, validators). When ``cached`` validators are given and the
+        server answers 304, returns (None, cached); on failure returns (None, None).
+        """
+        try:
+            logger.info("📥 Downloading: %s", url)
 
-            print(f"✅ Downloaded to: {temp_path}")
-            return temp_path
+            # Download with headers to avoid bot detection
+            headers = {'User-Agent': 'AirTracker/1.0 (Aircraft Image Processor)'}
+            if cached:
+                if cached.get('etag'):
+                    headers['If-None-Match'] = cached['etag']
+                if cached.get('last_modified'):
+                    headers['If-Modified-Since'] = cached['last_modified']
+
+            response = self.session.get(url, headers=headers, timeout=30)
+            if cached and response.status_code == 304:
+                logger.info("♻️ Not modified, reusing converted BMP")
+                return None, cached
+            response.raise_for_status()
+
+            logger.info("✅ Downloaded %d bytes", len(response.content))
+            validators = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }
+            return io.BytesIO(response.content), validators
 
         except Exception as e:
-            print(f"❌ Download failed: {e}")
-            return None
+            logger.warning("❌ Download failed: %s", e)
+            return None, None
 
-    def convert_to_bmp(self, input_path: str) -> Optional[str]:
+    def convert_to_bmp(self, source: io.BytesIO) -> Optional[io.BytesIO]:
         """Convert image to 24-bit BMP at target resolution."""
         try:
-            print(f"🔄 Converting to {TARGET_WIDTH}x{TARGET_HEIGHT} 24-bit BMP...")
+            logger.info("🔄 Converting to %dx%d 24-bit BMP...", TARGET_WIDTH, TARGET_HEIGHT)
 
             # Open and process image
-            with Image.open(input_path) as img:
+            with Image.open(source) as img:
+                # Let libjpeg decode straight at 1/2..1/8 scale (no-op for non-JPEG)
+                img.draft('RGB', (TARGET_WIDTH * 2, TARGET_HEIGHT * 2))
+
                 # Convert to RGB (24-bit)
                 if img.mode != 'RGB':
                     img = img.convert('RGB')
 
-                # Resize with high-quality resampling
-                # Use thumbnail to maintain aspect ratio, then pad if needed
-                img.thumbnail((TARGET_WIDTH, TARGET_HEIGHT), Image.Resampling.LANCZOS)
-
-                # Create new image with target size and center the resized image
-                new_img = Image.new('RGB', (TARGET_WIDTH, TARGET_HEIGHT), (0, 0, 0))
-
-                # Calculate position to center the image
-                x = (TARGET_WIDTH - img.width) // 2
-                y = (TARGET_HEIGHT - img.height) // 2
-                new_img.paste(img, (x, y))
+                # Cheap integer box prescale for large sources the draft couldn't shrink
+                if img.width > TARGET_WIDTH * 4:
+                    img = img.reduce(img.width // (TARGET_WIDTH * 2))
+
+                if img.width >= TARGET_WIDTH and img.width * TARGET_HEIGHT == img.height * TARGET_WIDTH:
+                    # Same aspect as the target: one box-then-bicubic resize straight to size
+                    img = img.resize((TARGET_WIDTH, TARGET_HEIGHT), _RESAMPLE, reducing_gap=_REDUCING_GAP)
+                else:
+                    # Use thumbnail to maintain aspect ratio, then pad if needed
+                    img.thumbnail((TARGET_WIDTH, TARGET_HEIGHT), _RESAMPLE, reducing_gap=_REDUCING_GAP)
+
+                if img.size == (TARGET_WIDTH, TARGET_HEIGHT):
+                    # Already fills the frame; no padding needed
+                    new_img = img
+                else:
+                    # Create new image with target size and center the resized image
+                    new_img = Image.new('RGB', (TARGET_WIDTH, TARGET_HEIGHT), (0, 0, 0))
+
+                    # Calculate position to center the image
+                    x = (TARGET_WIDTH - img.width) // 2
+                    y = (TARGET_HEIGHT - img.height) // 2
+                    new_img.paste(img, (x, y))
 
                 # Save as BMP
-                output_path = input_path.replace('original_', 'converted_').replace('.jpg', '.bmp').replace('.jpeg', '.bmp').replace('.png', '.bmp')
-                new_img.save(output_path, 'BMP')
+                output = io.BytesIO()
+                new_img.save(output, 'BMP')
 
-                print(f"✅ Converted: {output_path}")
-                return output_path
+                logger.info("✅ Converted: %d bytes", output.tell())
+                return output
 
         except Exception as e:
-            print(f"❌ Conversion failed: {e}")
+            logger.warning("❌ Conversion failed: %s", e)
             return None
 
-    def upload_to_zipline(self, bmp_path: str, original_url: str) -> Optional[str]:
+    def upload_to_zipline(self, bmp_data: io.BytesIO, original_url: str) -> Optional[str]:
         """Upload BMP to Zipline and return the URL."""
         try:
-            print(f"☁️ Uploading to Zipline...")
+            logger.info("☁️ Uploading to Zipline...")
 
             # Prepare the upload
             upload_url = f"{self.zipline_url.rstrip('/')}/api/upload"
@@ -197,125 +398,132 @@ class ImageProcessor:
 
             # Create meaningful filename with timestamp
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            original_filename = os.path.basename(bmp_path)
-            filename = f"aircraft_{timestamp}_{original_filename}"
+            filename = f"aircraft_{timestamp}_{_bmp_filename(original_url)}"
 
-            # File data
-            files = {
-                'file': (filename, open(bmp_path, 'rb'), 'image/bmp')
-            }
+            # Prebuilt multipart body (the BMP is small and fixed-size)
+            body, headers['Content-Type'] = _build_multipart(
+                filename, bmp_data.getvalue(), os.urandom(16).hex().encode())
 
             # Upload the file
-            response = requests.post(
+            response = self.session.post(
                 upload_url,
                 headers=headers,
-                files=files,
+                data=body,
                 timeout=30
             )
 
-            # Close the file
-            files['file'][1].close()
-
             if response.status_code == 200 or response.status_code == 201:
                 try:
                     result = response.json()
                     # Based on Zipline API: .files[0].url
                     zipline_url = result.get('files', [{}])[0].get('url')
-                    print(f"✅ Uploaded: {zipline_url}")
+                    logger.info("✅ Uploaded: %s", zipline_url)
                     return zipline_url
                 except Exception as e:
-                    print(f"❌ Couldn't parse Zipline response: {e}")
+                    logger.warning("❌ Couldn't parse Zipline response: %s", e)
                     return None
             else:
-                print(f"❌ Zipline upload failed: HTTP {response.status_code}: {response.text[:200]}")
+                logger.warning("❌ Zipline upload failed: HTTP %s: %s", response.status_code, response.text[:200])
                 return None
 
         except requests.exceptions.Timeout:
-            print(f"❌ Zipline upload timeout")
+            logger.warning("❌ Zipline upload timeout")
             return None
         except requests.exceptions.ConnectionError:
-            print(f"❌ Zipline connection error")
+            logger.warning("❌ Zipline connection error")
             return None
         except Exception as e:
-            print(f"❌ Zipline upload failed: {e}")
+            logger.warning("❌ Zipline upload failed: %s", e)
             return None
 
-    def cleanup_temp_files(self, files: List[str]):
-        """Remove temporary files."""
-        for file_path in files:
-            try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-            except OSError:
-                pass  # Ignore cleanup errors
-
     def process_image(self, url: str, force: bool = False) -> Optional[str]:
         """Process a single image: download, convert, upload."""
         # Check if already processed
-        if not force and url in self.processed_images:
-            existing_entry = self.processed_images[url]
-            print(f"⏭️ Already processed: {existing_entry['zipline_url']}")
-            return existing_entry['zipline_url']
-
-        temp_files = []
-
-        try:
-            # Download
-            downloaded_path = self.download_image(url)
-            if not downloaded_path:
-                return None
-            temp_files.append(downloaded_path)
+        if not force:
+            with self._lock:
+                existing_entry = self.processed_images.get(url)
+                if existing_entry is not None:
+                    self.processed_images.move_to_end(url)
+            if existing_entry is not None:
+                logger.info("⏭️ Already processed: %s", existing_entry['zipline_url'])
+                return existing_entry['zipline_url']
+
+        # Download (conditional when we still hold a BMP converted from this URL)
+        cached = _get_cached_bmp(url)
+        image_data, validators = self.download_image(url, cached)
+        if validators is None:
+            return None
 
+        if image_data is None:
+            # 304: source unchanged, skip the decode/resize
+            bmp_data = io.BytesIO(cached['bmp'])
+        else:
             # Convert to BMP
-            bmp_path = self.convert_to_bmp(downloaded_path)
-            if not bmp_path:
+            bmp_data = self.convert_to_bmp(image_data)
+            if not bmp_data:
                 return None
-            temp_files.append(bmp_path)
+            _put_cached_bmp(url, validators, bmp_data.getvalue())
 
-            # Upload to Zipline
-            zipline_url = self.upload_to_zipline(bmp_path, url)
-            if not zipline_url:
-                return None
+        # Upload to Zipline
+        zipline_url = self.upload_to_zipline(bmp_data, url)
+        if not zipline_url:
+            return None
 
+        with self._lock:
             # Store result
-            self.processed_images[url] = {
+            _store_processed(url, {
                 'zipline_url': zipline_url,
                 'processed_date': datetime.now().isoformat(),
                 'dimensions': f"{TARGET_WIDTH}x{TARGET_HEIGHT}",
                 'format': 'BMP',
                 'bits_per_pixel': BMP_BITS_PER_PIXEL
-            }
+            })
 
-            # Save to file only if not in memory-only mode
+            # Append to file only if not in memory-only mode
             if not self.use_memory_only:
-                self.save_processed_images_to_file()
-            print(f"🎉 Processing complete: {zipline_url}")
-            return zipline_url
-
-        finally:
-            # Cleanup
-            self.cleanup_temp_files(temp_files)
+                self.append_processed_to_file(url)
+        logger.info("🎉 Processing complete: %s", zipline_url)
+        return zipline_url
 
     def process_batch(self, urls: List[str], force: bool = False) -> Dict[str, Optional[str]]:
-        """Process multiple images."""
-        results = {}
-        total = len(urls)
-
-        for i, url in enumerate(urls, 1):
-            print(f"\n📷 Processing {i}/{total}: {url}")
-            result = self.process_image(url, force)
-            results[url] = result
+        """Process multiple images concurrently (download/upload are I/O bound)."""
+        results = dict.fromkeys(urls)  # keep input order regardless of completion order
+        total = len(results)
+
+        with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as ex:
+            futures = {ex.submit(self.process_image, url, force): url for url in results}
+            for i, future in enumerate(as_completed(futures), 1):
+                url = futures[future]
+                try:
+                    results[url] = future.result()
+                except Exception as e:
+                    logger.warning("❌ Processing failed for %s: %s", url, e)
+                logger.info("📷 Processed %d/%d: %s", i, total, url)
 
         return results
 
     def list_processed(self) -> Dict:
         """Return dictionary of all processed images."""
-        return self.processed_images.copy()
+        with self._lock:
+            return self.processed_images.copy()
 
     def get_zipline_url(self, original_url: str) -> Optional[str]:
         """Get Zipline URL for a processed image."""
-        entry = self.processed_images.get(original_url)
-        return entry['zipline_url'] if entry else None
+        with self._lock:
+            entry = self.processed_images.get(original_url)
+            if entry is None:
+                return None
+            self.processed_images.move_to_end(original_url)
+        return entry['zipline_url']
+
+
+def _iter_urls(path: str):
+    """Yield non-blank, non-comment lines from a batch file, stripped once."""
+    with open(path, 'r') as f:
+        for line in f:
+            s = line.strip()
+            if s and s[0] != '#':
+                yield s
 
 
 def main():
@@ -330,6 +538,7 @@ def main():
     parser.add_argument('--load-json', action='store_true', help='Load existing URLs from JSON file into memory')
 
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
 
     if not any([args.url, args.batch_file, args.list_processed, args.get_url]):
         parser.print_help()
@@ -342,7 +551,7 @@ def main():
     # Optionally load existing data from JSON into memory
     if args.load_json:
         file_data = processor.load_processed_images_from_file()
-        processor.processed_images.update(file_data)
+        _merge_processed(file_data)
         print(f"📂 Loaded {len(file_data)} images from {PROCESSED_URLS_FILE} into memory")
 
     if args.list_processed:
@@ -367,6 +576,8 @@ def main():
 
     elif args.url:
         result = processor.process_image(args.url, args.force)
+        if not use_memory_only:
+            processor.save_processed_images_to_file()
         if result:
             print(f"\n🎯 Final Zipline URL: {result}")
         else:
@@ -378,8 +589,8 @@ def main():
             print(f"❌ Batch file not found: {args.batch_file}")
             sys.exit(1)
 
-        with open(args.batch_file, 'r') as f:
-            urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        # Materialized only because the progress display needs the total
+        urls = list(_iter_urls(args.batch_file))
 
         if not urls:
             print(f"❌ No URLs found in: {args.batch_file}")
@@ -387,6 +598,8 @@ def main():
 
         print(f"📦 Processing {len(urls)} images from {args.batch_file}")
         results = processor.process_batch(urls, args.force)
+        if not use_memory_only:
+            processor.save_processed_images_to_file()
 
         # Summary
         successful = sum(1 for result in results.values() if result)
@@ -3,48 +3,163 @@
 Mock version of image processor for testing without Cloudinary credentials
 """
 import argparse
+import asyncio
+import functools
+import hashlib
+import io
 import json
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import os
+import shutil
+import socket
+import struct
 import sys
-import urllib.request
+import threading
 import urllib.parse
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 
 try:
+    import PIL
     from PIL import Image, ImageOps
+    import requests
+    from requests.adapters import HTTPAdapter
     from dotenv import load_dotenv
 except ImportError as e:
     print(f"Missing required dependency: {e}")
-    print("Install with: pip install Pillow python-dotenv")
+    print("Install with: pip install Pillow requests python-dotenv")
     sys.exit(1)
 
+logger = logging.getLogger('airtracker.img')
+
 # Load environment from root .env file
 root_env_path = os.path.join(os.path.dirname(__file__), '..', '..', '.env')
-if os.path.exists(root_env_path):
-    load_dotenv(root_env_path)
+
+@functools.lru_cache(maxsize=1)
+def _load_env_once() -> bool:
+    """Load the root .env once per process; a missing file is simply skipped."""
+    return load_dotenv(root_env_path)
+
+_load_env_once()
 
 # Configuration
 TARGET_WIDTH = 96
 TARGET_HEIGHT = 72
 BMP_BITS_PER_PIXEL = 24
 TEMP_DIR = "data/temp_images"
-
-# Global in-memory storage for processed images
-_processed_images_cache = {}
-
-def mock_cloudinary_upload(bmp_path: str, original_url: str) -> str:
+# Fixed 54-byte BMP header for TARGET_WIDTHxTARGET_HEIGHT at 24bpp (bottom-up rows,
+# 96 DPI like Pillow's encoder).
+_BMP_ROW_BYTES = TARGET_WIDTH * 3
+# The raw writer emits the pixel body as one contiguous block, which is only valid
+# while BMP rows need no padding to a 4-byte boundary
+assert _BMP_ROW_BYTES % 4 == 0, "TARGET_WIDTH * 3 must be a multiple of 4 for the raw BMP writer"
+_BMP_IMAGE_BYTES = _BMP_ROW_BYTES * TARGET_HEIGHT
+_BMP_HEADER = (
+    struct.pack('<2sIHHI', b'BM', 54 + _BMP_IMAGE_BYTES, 0, 0, 54)
+    + struct.pack('<IiiHHIIiiII', 40, TARGET_WIDTH, TARGET_HEIGHT, 1, BMP_BITS_PER_PIXEL,
+                  0, _BMP_IMAGE_BYTES, 3780, 3780, 0, 0)
+)
+PRESERVE_TEMP = False  # set by --preserve-temp; the pipeline itself never touches disk
+_temp_dir_ready = False
+DOWNLOAD_WORKERS = 8
+
+# Pillow-SIMD is a drop-in fork; its versions carry a ".postN" suffix
+PILLOW_SIMD = '.post' in PIL.__version__
+
+# Resampling filter for the downscale; BILINEAR is indistinguishable from LANCZOS at 96x72
+_RESAMPLE_FILTERS = {
+    'nearest': Image.Resampling.NEAREST,
+    'bilinear': Image.Resampling.BILINEAR,
+    'bicubic': Image.Resampling.BICUBIC,
+    'lanczos': Image.Resampling.LANCZOS,
+}
+RESAMPLE_FILTER = _RESAMPLE_FILTERS.get(os.getenv('AIRTRACKER_RESAMPLE', 'bilinear').lower(),
+                                        Image.Resampling.BILINEAR)
+
+class LRUCache:
+    """Small bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __getitem__(self, key):
+        value = self._data[key]
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def items(self):
+        return self._data.items()
+
+# Global in-memory storage for processed images (bounded for long-running producers)
+_processed_images_cache = LRUCache(maxsize=1000)
+
+# Converted BMP bytes keyed by a digest of the downloaded image, so a re-download
+# of the same picture (repeat tail numbers) skips decode/resize entirely
+_bmp_by_digest = LRUCache(maxsize=256)
+
+def source_digest(image_data: BinaryIO) -> str:
+    return hashlib.blake2b(image_data.getvalue(), digest_size=16).hexdigest()
+
+def get_processed_url(url: str) -> Optional[str]:
+    """Get the mock Cloudinary URL for a processed image, if still cached."""
+    entry = _processed_images_cache.get(url)
+    return entry['cloudinary_url'] if entry else None
+
+# Shared keep-alive session: CDN images mostly come from one host, so the TLS
+# handshake is paid once instead of per download
+_SESSION = requests.Session()
+_SESSION.headers['User-Agent'] = 'AirTracker/1.0 (Aircraft Image Processor)'
+_SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+_SESSION.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# Nearly every source image is served from this CDN host
+JP_CDN_HOST = "cdn.jetphotos.com"
+
+def _prewarm_dns() -> None:
+    """Resolve the image CDN in the background so the first download skips DNS."""
+    def resolve() -> None:
+        try:
+            socket.getaddrinfo(JP_CDN_HOST, 443, type=socket.SOCK_STREAM)
+        except OSError:
+            pass
+
+    threading.Thread(target=resolve, name="dns-prewarm", daemon=True).start()
+
+_prewarm_dns()
+
+def mock_cloudinary_upload(bmp_name: str, original_url: str) -> str:
     """Mock Cloudinary upload that returns a fake URL."""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = os.path.basename(bmp_path)
+    filename = os.path.basename(bmp_name)
     # Return a fake Cloudinary URL
     return f"https://res.cloudinary.com/airtracker/image/upload/v1234567890/airtracker/aircraft_{timestamp}_{filename.replace('.bmp', '')}.bmp"
 
-def download_image(url: str) -> Optional[str]:
-    """Download image from URL to temporary file."""
+def fetch_image_bytes(url: str) -> Optional[Tuple[io.BytesIO, str]]:
+    """Download image from URL into memory; returns (data, original_* filename)."""
     try:
-        print(f"📥 Downloading: {url}")
+        logger.debug("Downloading %s", url)
 
         # Create filename from URL
         parsed_url = urllib.parse.urlparse(url)
@@ -52,104 +167,260 @@ def download_image(url: str) -> Optional[str]:
         if not any(filename.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.bmp', '.gif']):
             filename += ".jpg"
 
-        os.makedirs(TEMP_DIR, exist_ok=True)
-        temp_path = os.path.join(TEMP_DIR, f"original_{filename}")
-
-        # Download with headers to avoid bot detection
-        req = urllib.request.Request(url, headers={
-            'User-Agent': 'AirTracker/1.0 (Aircraft Image Processor)'
-        })
-
-        with urllib.request.urlopen(req, timeout=30) as response:
-            with open(temp_path, 'wb') as f:
-                f.write(response.read())
+        # Download (session sends the User-Agent to avoid bot detection). Stream the
+        # body in 64KB chunks straight into the buffer; identity encoding keeps the
+        # raw stream equal to the image bytes.
+        image_data = io.BytesIO()
+        with _SESSION.get(url, timeout=30, stream=True,
+                          headers={'Accept-Encoding': 'identity'}) as response:
+            response.raise_for_status()
+            shutil.copyfileobj(response.raw, image_data, 64 * 1024)
 
-        print(f"✅ Downloaded to: {temp_path}")
-        return temp_path
+        logger.debug("Downloaded %d bytes", image_data.tell())
+        image_data.seek(0)
+        return image_data, f"original_{filename}"
 
     except Exception as e:
-        print(f"❌ Download failed: {e}")
+        logger.warning("Download failed for %s: %s", url, e)
         return None
 
-def convert_to_bmp(input_path: str) -> Optional[str]:
-    """Convert image to 24-bit BMP at target resolution."""
+def convert_to_bmp(source: Union[str, BinaryIO]) -> Optional[io.BytesIO]:
+    """Convert image (path or file object) to an in-memory 24-bit BMP at target resolution."""
     try:
-        print(f"🔄 Converting to {TARGET_WIDTH}x{TARGET_HEIGHT} 24-bit BMP...")
+        logger.debug("Converting to %dx%d 24-bit BMP", TARGET_WIDTH, TARGET_HEIGHT)
 
         # Open and process image
-        with Image.open(input_path) as img:
+        with Image.open(source) as img:
+            # Let libjpeg decode at a reduced DCT scale (1/2..1/8) instead of full res
+            if img.format == 'JPEG':
+                img.draft('RGB', (TARGET_WIDTH * 2, TARGET_HEIGHT * 2))
+
             # Convert to RGB (24-bit)
             if img.mode != 'RGB':
                 img = img.convert('RGB')
 
-            # Resize with high-quality resampling
-            img.thumbnail((TARGET_WIDTH, TARGET_HEIGHT), Image.Resampling.LANCZOS)
-
-            # Create new image with target size and center the resized image
-            new_img = Image.new('RGB', (TARGET_WIDTH, TARGET_HEIGHT), (0, 0, 0))
-
-            # Calculate position to center the image
-            x = (TARGET_WIDTH - img.width) // 2
-            y = (TARGET_HEIGHT - img.height) // 2
-            new_img.paste(img, (x, y))
-
-            # Save as BMP
-            output_path = input_path.replace('original_', 'converted_').replace('.jpg', '.bmp').replace('.jpeg', '.bmp').replace('.png', '.bmp')
-            new_img.save(output_path, 'BMP')
-
-            print(f"✅ Converted: {output_path}")
-            return output_path
+            if img.size == (TARGET_WIDTH, TARGET_HEIGHT):
+                # Already at target resolution: nothing to resample or pad
+                new_img = img
+            else:
+                # Resize with the configured resampling filter
+                img.thumbnail((TARGET_WIDTH, TARGET_HEIGHT), RESAMPLE_FILTER)
+
+                # Center the resized image on the reused canvas, blacking out only the letterbox
+                new_img = _target_canvas()
+                x = (TARGET_WIDTH - img.width) // 2
+                y = (TARGET_HEIGHT - img.height) // 2
+                for box in _letterbox_boxes(x, y, img.width, img.height):
+                    new_img.paste((0, 0, 0), box)
+                new_img.paste(img, (x, y))
+
+            # Emit the BMP directly: constant header + one unpadded block of BGR pixels,
+            # bottom row first (the raw packer does the flip and channel swap in C)
+            output = io.BytesIO()
+            output.write(_BMP_HEADER)
+            output.write(new_img.tobytes('raw', 'BGR', 0, -1))
+
+            logger.debug("Converted: %d bytes", output.tell())
+            return output
 
     except Exception as e:
-        print(f"❌ Conversion failed: {e}")
+        logger.warning("Conversion failed: %s", e)
         return None
 
+# One preallocated target-size canvas per thread (batch conversions run in worker
+# processes, single-image runs on the caller's thread)
+_canvas_local = threading.local()
+
+def _target_canvas() -> 'Image.Image':
+    canvas = getattr(_canvas_local, 'canvas', None)
+    if canvas is None:
+        canvas = _canvas_local.canvas = Image.new('RGB', (TARGET_WIDTH, TARGET_HEIGHT), (0, 0, 0))
+    return canvas
+
+def _letterbox_boxes(x: int, y: int, width: int, height: int) -> List[Tuple[int, int, int, int]]:
+    """Canvas regions left uncovered by a width x height image pasted at (x, y)."""
+    boxes = []
+    if y > 0:
+        boxes.append((0, 0, TARGET_WIDTH, y))
+    if y + height < TARGET_HEIGHT:
+        boxes.append((0, y + height, TARGET_WIDTH, TARGET_HEIGHT))
+    if x > 0:
+        boxes.append((0, y, x, y + height))
+    if x + width < TARGET_WIDTH:
+        boxes.append((x + width, y, TARGET_WIDTH, y + height))
+    return boxes
+
+def converted_name(original_name: str) -> str:
+    """Map an original_* download name to its converted_*.bmp name."""
+    return original_name.replace('original_', 'converted_').replace('.jpg', '.bmp').replace('.jpeg', '.bmp').replace('.png', '.bmp')
+
+def preserve_temp_files(files: List[Tuple[str, BinaryIO]]) -> List[str]:
+    """Write in-memory images to TEMP_DIR for inspection (--preserve-temp only)."""
+    global _temp_dir_ready
+    if not _temp_dir_ready:
+        os.makedirs(TEMP_DIR, exist_ok=True)
+        _temp_dir_ready = True
+
+    paths = []
+    for name, data in files:
+        path = os.path.join(TEMP_DIR, name)
+        # Write then rename so a reader never sees a half-written image
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data.getvalue())
+        os.replace(tmp_path, path)
+        paths.append(path)
+    logger.info("Temp files preserved for inspection: %s", paths)
+    return paths
+
+def download_images(urls: List[str]) -> Dict[str, Optional[Tuple[io.BytesIO, str]]]:
+    """Download several images concurrently; returns url -> (data, filename) (None on failure)."""
+    results = {}
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as ex:
+        futures = {ex.submit(fetch_image_bytes, url): url for url in dict.fromkeys(urls)}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+def record_mock_upload(url: str, bmp_name: str) -> str:
+    """Mock-upload a converted BMP and store the result in the memory cache."""
+    logger.debug("Uploading to Cloudinary (MOCK)")
+    cloudinary_url = mock_cloudinary_upload(bmp_name, url)
+    logger.debug("Uploaded (MOCK): %s", cloudinary_url)
+
+    # Store result in memory
+    _processed_images_cache[url] = {
+        'cloudinary_url': cloudinary_url,
+        'processed_date': datetime.now().isoformat(),
+        'dimensions': f"{TARGET_WIDTH}x{TARGET_HEIGHT}",
+        'format': 'BMP',
+        'bits_per_pixel': BMP_BITS_PER_PIXEL
+    }
+    return cloudinary_url
+
+def finish_mock_image(url: str, name: str, image_data: BinaryIO, bmp_data: BinaryIO) -> str:
+    """Preserve (if requested) and mock-upload one converted image."""
+    bmp_name = converted_name(name)
+    if PRESERVE_TEMP:
+        preserve_temp_files([(name, image_data), (bmp_name, bmp_data)])
+    return record_mock_upload(url, bmp_name)
+
+def process_images_parallel(urls: List[str], workers: Optional[int] = None) -> Dict[str, Optional[str]]:
+    """Pipeline a batch: each finished download is handed straight to a conversion process."""
+    results = dict.fromkeys(urls)
+    downloaded = {}
+
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as io_ex, \
+            ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as cpu_ex:
+        downloads = {io_ex.submit(fetch_image_bytes, url): url for url in results}
+        conversions = {}
+        # Producer: queue conversions (BytesIO pickles cheaply) while other downloads are in flight
+        for future in as_completed(downloads):
+            url = downloads[future]
+            fetched = future.result()
+            if not fetched:
+                continue
+            image_data, name = fetched
+            digest = source_digest(image_data)
+            cached = _bmp_by_digest.get(digest)
+            if cached is not None:
+                results[url] = finish_mock_image(url, name, image_data, io.BytesIO(cached))
+                continue
+            downloaded[url] = (image_data, name, digest)
+            conversions[cpu_ex.submit(convert_to_bmp, image_data)] = url
+
+        # Consumer: record mock uploads as conversions finish
+        for future in as_completed(conversions):
+            url = conversions[future]
+            bmp_data = future.result()
+            if bmp_data:
+                image_data, name, digest = downloaded[url]
+                _bmp_by_digest[digest] = bmp_data.getvalue()
+                results[url] = finish_mock_image(url, name, image_data, bmp_data)
+
+    logger.info("Stored in memory cache: %d images", len(_processed_images_cache))
+    return results
+
+def process_images_mock(urls: List[str]) -> Dict[str, Optional[str]]:
+    """Process many images: parallel downloads, then conversions across CPU cores."""
+    return process_images_parallel(urls)
+
 def process_image_mock(url: str) -> Optional[str]:
     """Process a single image with mock Cloudinary upload."""
-    temp_files = []
+    # Download
+    fetched = fetch_image_bytes(url)
+    if not fetched:
+        return None
+    image_data, name = fetched
 
-    try:
-        # Download
-        downloaded_path = download_image(url)
-        if not downloaded_path:
+    # Convert to BMP, unless these exact bytes were converted before
+    digest = source_digest(image_data)
+    cached = _bmp_by_digest.get(digest)
+    if cached is not None:
+        bmp_data = io.BytesIO(cached)
+    else:
+        bmp_data = convert_to_bmp(image_data)
+        if not bmp_data:
             return None
-        temp_files.append(downloaded_path)
+        _bmp_by_digest[digest] = bmp_data.getvalue()
+
+    # Mock Cloudinary upload
+    cloudinary_url = finish_mock_image(url, name, image_data, bmp_data)
+
+    logger.info("Processing complete: %s", cloudinary_url)
+    logger.info("Stored in memory cache: %d images", len(_processed_images_cache))
+    return cloudinary_url
+
+async def process_image_async(url: str, cpu_pool: ProcessPoolExecutor) -> Optional[str]:
+    """One image through the pipeline; awaiting each stage lets other images use the idle ones."""
+    loop = asyncio.get_running_loop()
+
+    # Download on a worker thread (shared keep-alive session)
+    fetched = await asyncio.to_thread(fetch_image_bytes, url)
+    if not fetched:
+        return None
+    image_data, name = fetched
 
-        # Convert to BMP
-        bmp_path = convert_to_bmp(downloaded_path)
-        if not bmp_path:
+    # Convert in a worker process, unless these exact bytes were converted before
+    digest = source_digest(image_data)
+    cached = _bmp_by_digest.get(digest)
+    if cached is not None:
+        bmp_data = io.BytesIO(cached)
+    else:
+        bmp_data = await loop.run_in_executor(cpu_pool, convert_to_bmp, image_data)
+        if not bmp_data:
             return None
-        temp_files.append(bmp_path)
-
-        # Mock Cloudinary upload
-        print(f"☁️ Uploading to Cloudinary (MOCK)...")
-        cloudinary_url = mock_cloudinary_upload(bmp_path, url)
-        print(f"✅ Uploaded (MOCK): {cloudinary_url}")
-
-        # Store result in memory
-        _processed_images_cache[url] = {
-            'cloudinary_url': cloudinary_url,
-            'processed_date': datetime.now().isoformat(),
-            'dimensions': f"{TARGET_WIDTH}x{TARGET_HEIGHT}",
-            'format': 'BMP',
-            'bits_per_pixel': BMP_BITS_PER_PIXEL
-        }
-
-        print(f"🎉 Processing complete: {cloudinary_url}")
-        print(f"💾 Stored in memory cache: {len(_processed_images_cache)} images")
-        return cloudinary_url
-
-    finally:
-        # Keep files for inspection
-        print(f"📂 Temp files preserved for inspection: {temp_files}")
+        _bmp_by_digest[digest] = bmp_data.getvalue()
+
+    return finish_mock_image(url, name, image_data, bmp_data)
+
+async def process_images_async(urls: List[str], workers: Optional[int] = None) -> Dict[str, Optional[str]]:
+    """Run every URL's download -> convert -> upload concurrently so stages overlap."""
+    unique = list(dict.fromkeys(urls))
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as cpu_pool:
+        results = await asyncio.gather(*(process_image_async(url, cpu_pool) for url in unique))
+    logger.info("Stored in memory cache: %d images", len(_processed_images_cache))
+    return dict(zip(unique, results))
 
 def main():
     """Main CLI interface."""
     parser = argparse.ArgumentParser(description="AirTracker Image Processor (Mock)")
     parser.add_argument('--url', help='Single image URL to process')
+    parser.add_argument('--batch-file', help='File containing URLs (one per line)')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Process the batch file with the asyncio pipeline')
     parser.add_argument('--list-processed', action='store_true', help='List all processed images')
+    parser.add_argument('--preserve-temp', action='store_true', help=f'Write downloaded/converted images to {TEMP_DIR} for inspection')
 
     args = parser.parse_args()
+    logging.basicConfig(level=os.getenv('AIRTRACKER_LOG_LEVEL', 'INFO').upper(),
+                        format='%(levelname)s %(name)s: %(message)s')
+
+    global PRESERVE_TEMP
+    PRESERVE_TEMP = args.preserve_temp
+
+    if PILLOW_SIMD:
+        logger.info("Using Pillow-SIMD %s", PIL.__version__)
 
     if args.url:
         result = process_image_mock(args.url)
@@ -159,6 +430,16 @@ def main():
             print("\n❌ Processing failed")
             sys.exit(1)
 
+    elif args.batch_file:
+        with open(args.batch_file, 'r') as f:
+            urls = [s for s in (line.strip() for line in f) if s and s[0] != '#']
+        if args.use_async:
+            results = asyncio.run(process_images_async(urls))
+        else:
+            results = process_images_mock(urls)
+        successful = sum(1 for result in results.values() if result)
+        print(f"\n📊 Summary: {successful}/{len(results)} images processed (MOCK)")
+
     elif args.list_processed:
         if _processed_images_cache:
             print(f"\n📋 {len(_processed_images_cache)} processed images in memory:")
@@ -5,14 +5,118 @@ Usage: python3 mqtt_publish.py [options]
 """
 
 import argparse
+import atexit
 import sys
 import os
 import json
-from typing import Optional
+import threading
+import time
+from typing import Dict, Optional, Tuple
 import paho.mqtt.client as mqtt
 
 
+# Long-lived clients keyed by (host, port, username); reused across publishes
+_client_cache: Dict[Tuple[str, int, Optional[str]], mqtt.Client] = {}
+_client_lock = threading.Lock()
+
+
+def _get_client(host: str, port: int, username: Optional[str], password: Optional[str],
+                timeout: int) -> Optional[mqtt.Client]:
+    """Return a connected cached client, creating it on first use."""
+    key = (host, port, username)
+    with _client_lock:
+        client = _client_cache.get(key)
+        if client is not None:
+            return client
+
+        connected = threading.Event()
+        state = {'error': None}
+
+        def on_connect(client, userdata, flags, rc, properties):
+            if rc != 0:
+                state['error'] = f"Connection failed with code {rc}"
+            connected.set()
+
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        client.on_connect = on_connect
+        if username and password:
+            client.username_pw_set(username, password)
+
+        try:
+            client.connect(host, port, timeout)
+        except Exception as e:
+            print(f"MQTT Error: {e}", file=sys.stderr)
+            return None
+        # The network loop thread also handles reconnects for the client's lifetime
+        client.loop_start()
+
+        if not connected.wait(timeout):
+            state['error'] = "Connection timeout"
+        if state['error']:
+            print(f"MQTT Error: {state['error']}", file=sys.stderr)
+            # Close the socket too, or every failed attempt leaks a connection
+            client.disconnect()
+            client.loop_stop()
+            return None
+
+        _client_cache[key] = client
+        return client
+
+
+def _shutdown_clients():
+    """Disconnect cached clients; queued QoS 0 publishes go out before DISCONNECT."""
+    with _client_lock:
+        for client in _client_cache.values():
+            try:
+                client.disconnect()
+                client.loop_stop()
+            except Exception:
+                pass
+        _client_cache.clear()
+
+
+atexit.register(_shutdown_clients)
+
+
 def publish_message(
+    host: str,
+    port: int,
+    topic: str,
+    payload: str,
+    username: Optional[str] = None,
+    password: Optional[str] = None,
+    retain: bool = False,
+    timeout: int = 10,
+    oneshot: bool = False
+) -> bool:
+    """Publish a message over a cached connection (QoS 0, no per-message handshake)"""
+    if oneshot:
+        return publish_message_oneshot(host, port, topic, payload, username, password, retain, timeout)
+
+    client = _get_client(host, port, username, password, timeout)
+    if client is None:
+        return False
+
+    result = client.publish(topic, payload, qos=0, retain=retain)
+    if result.rc != mqtt.MQTT_ERR_SUCCESS:
+        print(f"MQTT Error: publish failed with code {result.rc}", file=sys.stderr)
+        return False
+    return True
+
+
+def _loop_until(client: mqtt.Client, done, timeout: float) -> bool:
+    """Run client.loop() until done() is true; False on timeout or network error."""
+    deadline = time.monotonic() + timeout
+    while not done():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        if client.loop(timeout=min(1.0, remaining)) != mqtt.MQTT_ERR_SUCCESS:
+            return done()
+    return True
+
+
+def publish_message_oneshot(
     host: str,
     port: int,
     topic: str,
@@ -26,21 +130,18 @@ def publish_message(
 
     def on_connect(client, userdata, flags, rc, properties):
         if rc == 0:
-            userdata['connected'] = True
+            userdata['connected'].set()
         else:
             userdata['error'] = f"Connection failed with code {rc}"
-
-    def on_publish(client, userdata, mid, reason_code, properties):
-        userdata['published'] = True
+            userdata['connected'].set()
 
     def on_disconnect(client, userdata, disconnect_flags, reason_code, properties):
-        userdata['disconnected'] = True
+        userdata['disconnected'].set()
 
-    # Client data to track state
+    # Client data to track state; callbacks set the events
     client_data = {
-        'connected': False,
-        'published': False,
-        'disconnected': False,
+        'connected': threading.Event(),
+        'disconnected': threading.Event(),
         'error': None
     }
 
@@ -48,7 +149,6 @@ def publish_message(
         # Create MQTT client
         client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, userdata=client_data)
         client.on_connect = on_connect
-        client.on_publish = on_publish
         client.on_disconnect = on_disconnect
 
         # Set credentials if provided
@@ -58,17 +158,10 @@ def publish_message(
         # Connect to broker
         client.connect(host, port, timeout)
 
-        # Start network loop
-        client.loop_start()
-
-        # Wait for connection
-        import time
-        start_time = time.time()
-        while not client_data['connected'] and not client_data['error']:
-            if time.time() - start_time > timeout:
-                client_data['error'] = "Connection timeout"
-                break
-            time.sleep(0.1)
+        # Drive the network loop on this thread: loop() blocks in select() until
+        # traffic arrives, so each wait ends as soon as the broker answers
+        if not _loop_until(client, client_data['connected'].is_set, timeout):
+            client_data['error'] = client_data['error'] or "Connection timeout"
 
         if client_data['error']:
             print(f"MQTT Error: {client_data['error']}", file=sys.stderr)
@@ -78,24 +171,15 @@ def publish_message(
         result = client.publish(topic, payload, retain=retain)
 
         # Wait for publish confirmation
-        start_time = time.time()
-        while not client_data['published']:
-            if time.time() - start_time > timeout:
-                print("Publish timeout", file=sys.stderr)
-                return False
-            time.sleep(0.1)
+        if not _loop_until(client, result.is_published, timeout):
+            print("Publish timeout", file=sys.stderr)
+            return False
 
         # Disconnect
         client.disconnect()
 
-        # Wait for disconnect
-        start_time = time.time()
-        while not client_data['disconnected']:
-            if time.time() - start_time > 5:  # Shorter timeout for disconnect
-                break
-            time.sleep(0.1)
-
-        client.loop_stop()
+        # Wait for disconnect (shorter timeout)
+        _loop_until(client, client_data['disconnected'].is_set, 5)
         return True
 
     except Exception as e:
@@ -114,6 +198,8 @@ def main():
     parser.add_argument('-s', '--stdin', action='store_true', help='Read payload from stdin')
     parser.add_argument('-m', '--message', help='Message payload')
     parser.add_argument('--timeout', type=int, default=10, help='Connection timeout in seconds')
+    parser.add_argument('--oneshot', action='store_true',
+                        help='Connect, wait for publish confirmation and disconnect for this message only')
 
     args = parser.parse_args()
 
@@ -135,7 +221,8 @@ def main():
         username=args.username,
         password=args.password,
         retain=args.retain,
-        timeout=args.timeout
+        timeout=args.timeout,
+        oneshot=args.oneshot
     )
 
     return 0 if success else 1
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import os, sys, math, json, argparse, getpass, requests, time, subprocess
+import os, sys, math, json, argparse, getpass, requests, time, subprocess, atexit
 
 # Load environment variables from a local .env if present (no external deps)
 def _load_local_env() -> None:
@@ -36,6 +36,9 @@ def _load_local_env() -> None:
 
 _load_local_env()
 from typing import Tuple, List, Dict, Any, Optional, TYPE_CHECKING, cast
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 TIMEOUT = 15
 DATA_DIR_DEFAULT = os.path.join(os.path.dirname(__file__), "data")
@@ -49,6 +52,18 @@ def _ensure_parent_dir(path: str) -> None:
         pass
 UA_DEFAULT = "PlaneTester/2.4 (+requests)"
 
+def _make_session() -> requests.Session:
+    """Keep-alive session shared by every provider call; retries transient gateway errors."""
+    s = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=retry)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    s.headers["User-Agent"] = UA_DEFAULT  # requests already asks for gzip/deflate
+    return s
+
+HTTP = _make_session()
+
 # Optional Excel deps (pandas + openpyxl or xlsxwriter)
 try:
     import pandas as pd  # type: ignore
@@ -61,6 +76,8 @@ OSK_CLIENT_SECRET_DEFAULT = ""
 
 # ---------- MIL (ADSB.lol) ----------
 MIL_TTL_DEFAULT = 6 * 3600
+MIL_WORKERS = 8  # concurrent /v2/hex lookups for cache misses
+MIL_FLUSH_EVERY = 25  # per-hex cache updates buffered before rewriting the JSON file
 MIL_CACHE_FILE_DEFAULT = os.path.join(DATA_DIR_DEFAULT, "mil_cache.json")
 MIL_LIST_CACHE_FILE_DEFAULT = os.path.join(DATA_DIR_DEFAULT, "mil_list_cache.json")
 
@@ -137,7 +154,7 @@ OSK_TOKEN_URL = "https://auth.opensky-network.org/auth/realms/opensky-network/pr
 OSK_API_BASE  = "https://opensky-network.org/api"
 
 def get_opensky_token(client_id: str, client_secret: str) -> str:
-    r = requests.post(OSK_TOKEN_URL, data={
+    r = HTTP.post(OSK_TOKEN_URL, data={
         "grant_type": "client_credentials",
         "client_id": client_id,
         "client_secret": client_secret,
@@ -152,7 +169,7 @@ def fetch_opensky(lat: float, lon: float, radius_nm: float, client_id: Optional[
     headers: Dict[str, str] = {"User-Agent": UA_DEFAULT}
     if client_id and client_secret:
         headers["Authorization"] = f"Bearer {get_opensky_token(client_id, client_secret)}"
-    r = requests.get(f"{OSK_API_BASE}/states/all", params={
+    r = HTTP.get(f"{OSK_API_BASE}/states/all", params={
         "lamin": f"{s:.6f}", "lamax": f"{n:.6f}", "lomin": f"{w:.6f}", "lomax": f"{e:.6f}",
     }, headers=headers, timeout=TIMEOUT)
     print(f"  [OpenSky] Tried: {r.url}")
@@ -206,7 +223,7 @@ def normalize_opensky_wide(js: Dict[str, Any]) -> List[Dict[str, Any]]:
 # ====================== ADSB.lol ======================
 def fetch_adsb(lat: float, lon: float, radius_nm: float, debug: bool, dump: bool) -> Dict[str, Any]:
     url = f"https://api.adsb.lol/v2/point/{lat:.6f}/{lon:.6f}/{int(radius_nm)}"
-    r = requests.get(url, headers={"User-Agent": UA_DEFAULT}, timeout=TIMEOUT)
+    r = HTTP.get(url, headers={"User-Agent": UA_DEFAULT}, timeout=TIMEOUT)
     print(f"  [ADSB.lol] Tried: {r.url}")
     log_http_response(r, "ADSB.lol", debug)
     r.raise_for_status()
@@ -269,7 +286,7 @@ def fetch_fr24_all(lat: float, lon: float, radius_nm: float, debug: bool, dump:
     params: Dict[str, Any] = dict(FR24_DEFAULT_PARAMS)  # explicitly Any for bounds string
     params["bounds"] = f"{n:.6f},{s:.6f},{w:.6f},{e:.6f}"
     url = f"https://{FR24_HOST}{FR24_PATH}"
-    r = requests.get(url, params=params, headers=fr24_headers(ua, esp_mode, cookie), timeout=TIMEOUT)
+    r = HTTP.get(url, params=params, headers=fr24_headers(ua, esp_mode, cookie), timeout=TIMEOUT)
     print(f"  [FR24] Tried: {r.url}")
     log_http_response(r, f"FR24 {FR24_HOST}", debug)
     r.raise_for_status()
@@ -345,6 +362,9 @@ class MilCache:
                     self.cache = json.load(f)
             except Exception:
                 self.cache = {}
+        self._dirty = 0
+        atexit.register(self.flush)
+        self.session = HTTP  # keep-alive across per-hex lookups
 
     def _save(self):
         try:
@@ -354,19 +374,31 @@ class MilCache:
         except Exception:
             pass
 
+    def flush(self):
+        """Write buffered updates to disk (no-op when nothing changed)."""
+        if self._dirty:
+            self._save()
+            self._dirty = 0
+
+    def _record(self, key: str, mil_flag: Optional[bool]):
+        self.cache[key] = {"mil": mil_flag, "ts": time.time()}
+        self._dirty += 1
+        if self._dirty >= MIL_FLUSH_EVERY:
+            self.flush()
+
     def _expired(self, t):
         return (time.time() - t) > self.ttl
 
-    def check_hex(self, hex_str: str) -> Optional[bool]:
-        if not hex_str or hex_str.startswith("~"):
-            return None
-        key = hex_str.upper()
+    def _fresh(self, key: str) -> Optional[Dict[str, Any]]:
         ent = self.cache.get(key)
         if ent and not self._expired(ent.get("ts", 0)):
-            return ent.get("mil")
+            return ent
+        return None
+
+    def _lookup(self, key: str) -> Optional[bool]:
         url = f"https://api.adsb.lol/v2/hex/{key}"
         try:
-            r = requests.get(url, headers={"User-Agent": UA_DEFAULT}, timeout=TIMEOUT)
+            r = self.session.get(url, timeout=TIMEOUT)
             if self.debug: print(f"  [MIL perhex] {url} -> {r.status_code}")
             r.raise_for_status()
             js = r.json()
@@ -378,15 +410,44 @@ class MilCache:
                 mil_flag = bool(flags & 1) if isinstance(flags, int) else a0.get("mil")
             elif isinstance(js, dict) and "mil" in js:
                 mil_flag = bool(js["mil"])
-            self.cache[key] = {"mil": mil_flag, "ts": time.time()}
-            self._save()
             return mil_flag
         except Exception as e:
             if self.debug: print(f"  [MIL perhex] error for {key}: {e}")
-            self.cache[key] = {"mil": None, "ts": time.time()}
-            self._save()
             return None
 
+    def check_hex(self, hex_str: str) -> Optional[bool]:
+        if not hex_str or hex_str.startswith("~"):
+            return None
+        key = hex_str.upper()
+        ent = self._fresh(key)
+        if ent:
+            return ent.get("mil")
+        mil_flag = self._lookup(key)
+        self._record(key, mil_flag)
+        return mil_flag
+
+    def check_hexes(self, hex_list: List[str]) -> Dict[str, Optional[bool]]:
+        """Resolve many hexes at once; cache misses are fetched concurrently."""
+        out: Dict[str, Optional[bool]] = {}
+        misses: Dict[str, None] = {}  # insertion-ordered set of keys to fetch
+        for hx in hex_list:
+            if not hx or hx.startswith("~"):
+                continue
+            key = hx.upper()
+            if key in out or key in misses:
+                continue
+            ent = self._fresh(key)
+            if ent:
+                out[key] = ent.get("mil")
+            else:
+                misses[key] = None
+        if misses:
+            with ThreadPoolExecutor(max_workers=min(MIL_WORKERS, len(misses))) as pool:
+                for key, mil_flag in zip(misses, pool.map(self._lookup, misses)):
+                    self._record(key, mil_flag)
+                    out[key] = mil_flag
+        return out
+
 class MilListCache:
     """TTL cache for global /v2/mil list."""
     def __init__(self, path=MIL_LIST_CACHE_FILE_DEFAULT, ttl=MIL_TTL_DEFAULT, debug=False):
@@ -417,7 +478,7 @@ class MilListCache:
         if self.data and (time.time() - self.data["ts"]) <= self.ttl:
             return self.data
         url = "https://api.adsb.lol/v2/mil"
-        r = requests.get(url, headers={"User-Agent": UA_DEFAULT}, timeout=TIMEOUT)
+        r = HTTP.get(url, headers={"User-Agent": UA_DEFAULT}, timeout=TIMEOUT)
         print(f"  [ADSB.lol] Tried: {r.url}")
         log_http_response(r, "ADSB.lol /v2/mil", self.debug)
         r.raise_for_status()
@@ -591,9 +652,11 @@ def main():
                 hx = (r.get(hex_field) or "").upper()
                 r["mil"] = (hx in mil_hex_set) if hx else None
         elif args.mil_mode == "perhex" and mil_perhex_cache is not None:
-            for r in rows:
-                hx = (r.get(hex_field) or "").upper()
-                r["mil"] = mil_perhex_cache.check_hex(hx) if hx else None
+            hexes = [(r.get(hex_field) or "").upper() for r in rows]
+            flags = mil_perhex_cache.check_hexes(hexes)
+            for r, hx in zip(rows, hexes):
+                r["mil"] = flags.get(hx) if hx else None
+            mil_perhex_cache.flush()
 
     osk_rows: List[Dict[str, Any]] = []
     lol_rows: List[Dict[str, Any]] = []
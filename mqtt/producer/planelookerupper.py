@@ -14,24 +14,40 @@ from __future__ import annotations
 
 import argparse
 import concurrent.futures as cf
+import copy
 import dataclasses
+import functools
 import json
+import random
+import re
+import socket
+import threading
 import time
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
 from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
 try:
     from zoneinfo import ZoneInfo  # Python 3.9+
 except Exception:  # pragma: no cover
     ZoneInfo = None  # type: ignore
+from html import unescape
 from html.parser import HTMLParser
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 import requests
 from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
 from urllib3.util.ssl_ import create_urllib3_context
 import urllib3
 import ssl
 
+try:
+    import orjson  # optional: faster decoding of the FR24 flight list
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
 # Disable SSL warnings for compatibility
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -53,8 +69,20 @@ UA = (
     "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 )
 
+# JetPhotos detail pages are fetched up to JP_MAX_WORKERS at a time; size the
+# per-host pool so those, the search page and the FR24 pair never have to open
+# throwaway connections.
+JP_MAX_WORKERS = 8
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 16
+
 
 class TLSAdapter(HTTPAdapter):
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("pool_connections", POOL_CONNECTIONS)
+        kwargs.setdefault("pool_maxsize", POOL_MAXSIZE)
+        super().__init__(*args, **kwargs)
+
     def init_poolmanager(self, *args, **kwargs):
         ctx = create_urllib3_context(ciphers=CIPHERS)
         ctx.minimum_version = ssl.TLSVersion.TLSv1_2
@@ -77,99 +105,231 @@ def get_session(timeout_s: int = 10) -> requests.Session:
             "User-Agent": UA,
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.9",
+            # gzip/deflate always; br (and zstd) only when urllib3 can decode them,
+            # i.e. the optional brotli package is installed
+            "Accept-Encoding": ACCEPT_ENCODING,
             "Upgrade-Insecure-Requests": "1",
             "Pragma": "no-cache",
             "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
         }
     )
-    # Use standard HTTP adapters for compatibility
-    s.mount("https://", HTTPAdapter())
-    s.mount("http://", HTTPAdapter())
+    # Use standard HTTP adapters for compatibility; keep sockets pooled per host
+    pool_kw = dict(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, pool_block=False, max_retries=0)
+    s.mount("https://", HTTPAdapter(**pool_kw))
+    s.mount("http://", HTTPAdapter(**pool_kw))
     s.request_timeout = timeout_s
     # Start with SSL verification disabled for compatibility
     s.verify = False
     return s
 
 
+@functools.lru_cache(maxsize=4)
+def _session(timeout_s: int = 10) -> requests.Session:
+    """Process-wide Session so keep-alive sockets survive across lookups."""
+    return get_session(timeout_s)
+
+
+# A 403/429 from a host means we're being throttled; stop hitting it for a while
+# instead of letting every worker thread burn its own retries against it.
+HOST_COOLDOWN_S = 30.0
+_host_cooldown: Dict[str, float] = {}
+_host_cooldown_lock = threading.Lock()
+
+# Validators + body of recent pages so repeat visits can be conditional GETs:
+# url -> (stored_at, etag, last_modified, text)
+HTTP_CACHE_TTL_S = 24 * 3600
+HTTP_CACHE_MAXSIZE = 256
+_http_cache: "OrderedDict[str, Tuple[float, Optional[str], Optional[str], str]]" = OrderedDict()
+_http_cache_lock = threading.Lock()
+
+
+def _http_cache_get(url: str) -> Optional[Tuple[float, Optional[str], Optional[str], str]]:
+    with _http_cache_lock:
+        hit = _http_cache.get(url)
+        if hit is None:
+            return None
+        if time.monotonic() - hit[0] > HTTP_CACHE_TTL_S:
+            del _http_cache[url]
+            return None
+        _http_cache.move_to_end(url)
+        return hit
+
+
+def _http_cache_put(url: str, etag: Optional[str], last_modified: Optional[str], text: str) -> None:
+    with _http_cache_lock:
+        _http_cache[url] = (time.monotonic(), etag, last_modified, text)
+        _http_cache.move_to_end(url)
+        while len(_http_cache) > HTTP_CACHE_MAXSIZE:
+            _http_cache.popitem(last=False)
+
+
 def fetch_html(url: str, session: Optional[requests.Session] = None, *, referer: Optional[str] = None, headers: Optional[Dict[str, str]] = None) -> str:
-    s = session or get_session()
+    s = session or _session()
+    host = urlsplit(url).hostname or ""
+    with _host_cooldown_lock:
+        cooldown_until = _host_cooldown.get(host, 0.0)
+    if time.monotonic() < cooldown_until:
+        raise RuntimeError(f"Error sending request to {url}: {host} throttled, cooling down")
+
+    cached = _http_cache_get(url)
     last_err: Optional[Exception] = None
     for attempt in range(3):
         try:
             req_headers: Dict[str, str] = {}
             if referer:
                 req_headers["Referer"] = referer
+            if cached is not None:
+                if cached[1]:
+                    req_headers["If-None-Match"] = cached[1]
+                if cached[2]:
+                    req_headers["If-Modified-Since"] = cached[2]
             if headers:
                 req_headers.update(headers)
             resp = s.get(url, timeout=s.request_timeout, headers=req_headers or None)
-            if resp.status_code == 200:
-                ctype = resp.headers.get("Content-Type", "")
-                if not ctype.startswith("text/html"):
-                    raise RuntimeError(f"Content-Type not text/html: {ctype}")
-                return resp.text
-            if resp.status_code == 403 and attempt < 2:
-                time.sleep(0.6 * (attempt + 1))
-                continue
-            raise RuntimeError(f"HTTP {resp.status_code} for URL: {url}")
         except Exception as e:
             last_err = e
-            if attempt >= 2:
-                break
-            time.sleep(0.3 * (attempt + 1))
+        else:
+            if resp.status_code == 200:
+                ctype = resp.headers.get("Content-Type", "")
+                if ctype.startswith("text/html"):
+                    text = resp.text
+                    etag = resp.headers.get("ETag")
+                    last_modified = resp.headers.get("Last-Modified")
+                    if etag or last_modified:
+                        _http_cache_put(url, etag, last_modified, text)
+                    return text
+                last_err = RuntimeError(f"Content-Type not text/html: {ctype}")
+            elif resp.status_code == 304 and cached is not None:
+                _http_cache_put(url, cached[1], cached[2], cached[3])
+                return cached[3]
+            elif resp.status_code in (403, 429):
+                with _host_cooldown_lock:
+                    _host_cooldown[host] = time.monotonic() + HOST_COOLDOWN_S
+                raise RuntimeError(f"Error sending request to {url}: HTTP {resp.status_code}, backing off {host}")
+            else:
+                last_err = RuntimeError(f"HTTP {resp.status_code} for URL: {url}")
+        if attempt < 2:
+            # Jittered exponential backoff so parallel workers don't retry in lockstep
+            time.sleep(random.uniform(0.3, 0.6) * 2 ** attempt)
     raise RuntimeError(f"Error sending request to {url}: {last_err}")
 
 
+# Long-lived pools instead of spawning threads per lookup. Site-level tasks
+# (run_jp/run_fr) block on page fetches, so they get their own pool; leaf fetches
+# never wait on other pool work, which keeps the two-level fan-out deadlock-free.
+_EXEC = cf.ThreadPoolExecutor(max_workers=4, thread_name_prefix="airtracker")
+_IO_EXEC = cf.ThreadPoolExecutor(max_workers=JP_MAX_WORKERS + 2, thread_name_prefix="airtracker-io")
+
+
+def _gather(calls: List[Callable[[], Any]], executor: cf.ThreadPoolExecutor = _IO_EXEC) -> List[Any]:
+    """Run zero-arg callables concurrently and return their results in order.
+
+    A single call runs inline on the caller's thread (no hand-off for the
+    common photos=1 / only-one-site case). The first failure, in submission
+    order, is re-raised once every call has finished.
+    """
+    if not calls:
+        return []
+    if len(calls) == 1:
+        return [calls[0]()]
+    futs = [executor.submit(c) for c in calls]
+    cf.wait(futs)
+    return [f.result() for f in futs]
+
+
 # =====================
 # Tokenizer / Scraper
 # =====================
 
-@dataclass
+_NO_CLASSES: frozenset = frozenset()
+
+
 class Token:
-    kind: str  # "start" | "text"
-    tag: Optional[str] = None
-    attrs: Optional[Dict[str, str]] = None
-    data: Optional[str] = None
+    # Pages yield thousands of these; slots keep them small and cheap to build
+    __slots__ = ("kind", "tag", "attrs", "data", "classes")
+
+    def __init__(self, kind: str, tag: Optional[str] = None, attrs: Optional[List[Tuple[str, Optional[str]]]] = None,
+                 data: Optional[str] = None, classes: frozenset = _NO_CLASSES):
+        self.kind = kind  # "start" | "text"
+        self.tag = tag
+        self.attrs = attrs
+        self.data = data
+        self.classes = classes
+
+
+def _attr(t: Token, name: str) -> Optional[str]:
+    """Look up one attribute on the raw (name, value) list HTMLParser gave us."""
+    val = None
+    # Tags carry a handful of attributes; a scan beats building a dict per tag.
+    # Later duplicates win, as they would in dict(attrs).
+    for k, v in t.attrs or ():
+        if k == name:
+            val = v
+    return val
+
+
+@functools.lru_cache(maxsize=256)
+def _class_set(cls: str) -> frozenset:
+    # Normalize whitespace; selectors repeat, so split each one only once
+    return frozenset(cls.split())
 
 
 class _Parser(HTMLParser):
     def __init__(self):
         super().__init__(convert_charrefs=True)
         self.tokens: List[Token] = []
+        # (tag, "") and (tag, class) -> ascending token positions
+        self.index: Dict[Tuple[str, str], List[int]] = defaultdict(list)
 
     def handle_starttag(self, tag, attrs):
-        self.tokens.append(Token(kind="start", tag=tag, attrs=dict(attrs)))
+        tcls = None
+        for k, v in attrs:
+            if k == "class":
+                tcls = v
+        classes = _class_set(tcls) if tcls else _NO_CLASSES
+        pos = len(self.tokens)
+        self.index[(tag, "")].append(pos)
+        for c in classes:
+            self.index[(tag, c)].append(pos)
+        self.tokens.append(Token("start", tag, attrs, None, classes))
 
     def handle_data(self, data):
-        self.tokens.append(Token(kind="text", data=data))
+        self.tokens.append(Token("text", None, None, data))
+
+
+@functools.lru_cache(maxsize=16)
+def _tokenize(html_text: str) -> Tuple[List[Token], Dict[Tuple[str, str], List[int]]]:
+    # Unchanged pages (e.g. a 304 served from the HTTP cache) skip re-parsing.
+    # Tokens and index are read-only after parsing, so Scrapers can share them.
+    p = _Parser()
+    p.feed(html_text)
+    p.close()
+    return p.tokens, p.index
 
 
 class Scraper:
     def __init__(self, html_text: str):
-        p = _Parser()
-        p.feed(html_text)
-        p.close()
-        self.tokens: List[Token] = p.tokens
+        self.tokens: List[Token]
+        self.index: Dict[Tuple[str, str], List[int]]
+        self.tokens, self.index = _tokenize(html_text)
         self.pos: int = 0
 
-    def _token_has_class(self, t: Token, cls: str) -> bool:
-        # Be tolerant of class order and extra classes.
-        # If caller passes multiple classes (space-separated), require all to be present.
-        if not cls:
-            return True
-        if not t.attrs:
-            return False
-        tcls = t.attrs.get("class", "")
-        if not tcls:
-            return False
-        # Normalize whitespace and compare as sets
-        req = {c for c in cls.split() if c}
-        have = {c for c in tcls.split() if c}
-        return req.issubset(have)
+    def _candidates(self, tag: str, req: frozenset) -> List[int]:
+        if not req:
+            return self.index.get((tag, ""), [])
+        # Walk the positions of the rarest requested class; the rest are checked per token
+        return min((self.index.get((tag, c), []) for c in req), key=len)
 
     def _next_start(self, tag: str, cls: str) -> Token:
-        for i in range(self.pos, len(self.tokens)):
+        # Be tolerant of class order and extra classes.
+        # If caller passes multiple classes (space-separated), require all to be present.
+        req = _class_set(cls) if cls else _NO_CLASSES
+        cands = self._candidates(tag, req)
+        for j in range(bisect_left(cands, self.pos), len(cands)):
+            i = cands[j]
             tok = self.tokens[i]
-            if tok.kind == "start" and tok.tag == tag and self._token_has_class(tok, cls):
+            if req <= tok.classes:
                 self.pos = i + 1
                 return tok
         raise RuntimeError(f"tag '{tag}' with class '{cls}' not found")
@@ -217,14 +377,16 @@ class Scraper:
             if t.attrs:
                 # Prefer explicit href/src, then data-* fallbacks
                 for k in ("href", "src", "data-src"):
-                    if k in t.attrs and t.attrs[k]:
-                        href = t.attrs[k]
+                    v = _attr(t, k)
+                    if v:
+                        href = v
                         break
                 if not href:
                     for k in ("srcset", "data-srcset"):
-                        if k in t.attrs and t.attrs[k]:
+                        v = _attr(t, k)
+                        if v:
                             # Take the first URL from a srcset list
-                            first = t.attrs[k].split(",")[0].strip().split()[0]
+                            first = v.split(",")[0].strip().split()[0]
                             href = first
                             break
             out.append(href)
@@ -237,6 +399,24 @@ class Scraper:
     def advance(self, start_tag: str, cls: str, count: int) -> None:
         self._scrape_next(start_tag, cls, count, want_text=False, scrape=False)
 
+    def extract_bulk(self, selectors: List[Tuple[str, str, str, int]]) -> List[List[str]]:
+        """Run (mode, tag, cls, count) selectors in order in one forward walk.
+
+        mode is "text", "link" or "skip" (advance only; yields []). The cursor
+        never moves backwards, so together with the tag/class index the page is
+        visited at most once however many fields are pulled from it.
+        """
+        out: List[List[str]] = []
+        for mode, tag, cls, count in selectors:
+            if mode == "text":
+                out.append(self.scrape_text(tag, cls, count))
+            elif mode == "link":
+                out.append(self.scrape_links(tag, cls, count))
+            else:
+                self.advance(tag, cls, count)
+                out.append([])
+        return out
+
 
 # ==========================
 # Site-specific scrapers
@@ -247,6 +427,24 @@ FR_API_FLIGHTS_URL = "https://api.flightradar24.com/common/v1/flight/list.json"
 JP_HOME_URL = "https://www.jetphotos.com"
 
 
+def _prewarm_dns() -> None:
+    """Resolve the scraped hosts in the background so the first lookup skips DNS."""
+    def resolve(host: str) -> None:
+        try:
+            socket.getaddrinfo(host, 443, type=socket.SOCK_STREAM)
+        except OSError:
+            pass
+
+    hosts = {urlsplit(u).hostname for u in (FR_AIRCRAFT_URL, FR_API_FLIGHTS_URL, JP_HOME_URL)}
+    ex = cf.ThreadPoolExecutor(max_workers=len(hosts), thread_name_prefix="dns-prewarm")
+    for host in hosts:
+        ex.submit(resolve, host)
+    ex.shutdown(wait=False)
+
+
+_prewarm_dns()
+
+
 @dataclass
 class FlightAttributes:
     Date: str
@@ -309,12 +507,39 @@ class APIQueries:
     OnlyFR: bool = False
 
 
-def scrape_flightradar(q: APIQueries, session: Optional[requests.Session] = None) -> FlightRadarResult:
-    reg = q.Reg
-    url = f"{FR_AIRCRAFT_URL}{reg}"
-    html = fetch_html(url, session=session)
-    s = Scraper(html)
+def _fetch_fr_api(reg: str, limit: int, session: Optional[requests.Session] = None) -> Optional[Dict[str, Any]]:
+    """Fetch the FR24 flight-list JSON; None when it could not be fetched (HTML fallback)."""
+    try:
+        return _fetch_fr_api_json(reg, limit, session=session)
+    except Exception:
+        return None
 
+
+# <span class="details">…</span> blocks in the FR24 aircraft page header
+_FR_DETAILS_RE = re.compile(
+    r"""<span\b[^>]*\bclass\s*=\s*["'][^"']*(?<![\w-])details(?![\w-])[^"']*["'][^>]*>(.*?)</span>""",
+    re.IGNORECASE | re.DOTALL,
+)
+_TAG_RE = re.compile(r"<[^>]*>")
+FR_HEADER_FIELDS = 7
+
+
+def _extract_fr_headers(html: str) -> Optional[List[str]]:
+    """Pull the 7 header fields straight from the FR24 page without tokenizing it.
+
+    Each field is the first non-blank text inside a span.details block (the
+    airline may be wrapped in a link). Returns None if the layout doesn't match.
+    """
+    out: List[str] = []
+    for m in _FR_DETAILS_RE.finditer(html):
+        text = next((seg for seg in _TAG_RE.split(m.group(1)) if seg.strip()), "")
+        out.append(unescape(text).strip())
+        if len(out) == FR_HEADER_FIELDS:
+            return out
+    return None
+
+
+def _scrape_fr_headers(s: Scraper, reg: str, url: str) -> List[str]:
     aircraft = s.scrape_text("span", "details", 1)[0].strip()
 
     s.advance("span", "details", 1)
@@ -327,23 +552,47 @@ def scrape_flightradar(q: APIQueries, session: Optional[requests.Session] = None
     details = s.scrape_text("span", "details", 5)
     if len(details) != 5:
         raise RuntimeError(f"Unexpected details count for {reg} at {url}")
-    operator = details[0].strip()
-    type_code = details[1].strip()
-    airline_code = details[2].strip()
-    operator_code = details[3].strip()
-    mode_s = details[4].strip()
+    return [aircraft, airline] + [d.strip() for d in details]
+
+
+def scrape_flightradar(q: APIQueries, session: Optional[requests.Session] = None) -> FlightRadarResult:
+    reg = q.Reg
+    url = f"{FR_AIRCRAFT_URL}{reg}"
+    api_js = _fetch_fr_api(reg, q.Flights, session=session)
 
     flights: List[FlightAttributes] = []
 
     # First try the public JSON API used by the FR24 webapp; fall back to HTML if blocked
-    try:
-        flights = _fetch_fr_api_flights(reg, q.Flights, session=session)
-    except Exception:
-        # Ignore and fall back to HTML scraping below
-        flights = []
+    if api_js is not None:
+        try:
+            flights = _parse_fr_api_flights(api_js, q.Flights)
+        except Exception:
+            # Ignore and fall back to HTML scraping below
+            flights = []
+
+    # Common case: the API carries both the flights and the aircraft metadata,
+    # so the HTML page never needs to be looked at
+    if flights:
+        api_headers = _fr_headers_from_api(api_js)
+        if api_headers is not None:
+            return _fr_result(api_headers, flights)
+
+    # Only now is the aircraft page needed; fetch errors propagate as before
+    html = fetch_html(url, session=session)
+
+    # Targeted extraction first; only tokenize the page if the layout surprised us
+    s: Optional[Scraper] = None
+    headers = _extract_fr_headers(html)
+    if headers is None:
+        s = Scraper(html)
+        headers = _scrape_fr_headers(s, reg, url)
 
     if not flights:
         try:
+            if s is None:
+                s = Scraper(html)
+                # Position the cursor past the header block
+                _scrape_fr_headers(s, reg, url)
             # Legacy HTML table parsing (structure may change over time)
             s.advance("td", "w40 hidden-xs hidden-sm", 3)
             for _ in range(q.Flights):
@@ -352,6 +601,11 @@ def scrape_flightradar(q: APIQueries, session: Optional[requests.Session] = None
             # No flights section or layout changed — leave empty
             pass
 
+    return _fr_result(headers, flights)
+
+
+def _fr_result(headers: List[str], flights: List[FlightAttributes]) -> FlightRadarResult:
+    aircraft, airline, operator, type_code, airline_code, operator_code, mode_s = headers
     return FlightRadarResult(
         Aircraft=aircraft,
         Airline=airline,
@@ -364,6 +618,27 @@ def scrape_flightradar(q: APIQueries, session: Optional[requests.Session] = None
     )
 
 
+def _fr_headers_from_api(js: Dict[str, Any]) -> Optional[List[str]]:
+    """Build the 7 header fields from the flight-list aircraftInfo block, if present."""
+    info = _dig(js, _P_AIRCRAFT_INFO, None)
+    if not isinstance(info, dict):
+        return None
+    model_text = _dig(info, _P_MODEL_TEXT)
+    model_code = _dig(info, _P_MODEL_CODE)
+    if not (model_text or model_code):
+        return None
+    airline_codes = [c for c in (_dig(info, _P_AIRLINE_IATA), _dig(info, _P_AIRLINE_ICAO)) if c]
+    return [
+        str(model_text).strip(),
+        str(_dig(info, _P_AIRLINE_NAME)).strip(),
+        str(_dig(info, _P_OWNER_NAME)).strip(),
+        str(model_code).strip(),
+        " / ".join(str(c).strip() for c in airline_codes),
+        str(_dig(info, _P_OWNER_ICAO) or _dig(info, _P_OWNER_IATA)).strip(),
+        str(_dig(info, _P_HEX)).strip().upper(),
+    ]
+
+
 def _scrape_fr_flight_row(s: Scraper) -> FlightAttributes:
     date = s.scrape_text("td", "hidden-xs hidden-sm", 1)[0].strip()
     ft = s.scrape_text("td", "text-center-sm hidden-xs hidden-sm", 2)
@@ -387,7 +662,11 @@ def _fetch_fr_api_flights(reg: str, limit: int, session: Optional[requests.Sessi
 
     Falls back to empty list if unreachable or schema changes.
     """
-    s = session or get_session()
+    return _parse_fr_api_flights(_fetch_fr_api_json(reg, limit, session=session), limit)
+
+
+def _fetch_fr_api_json(reg: str, limit: int, session: Optional[requests.Session] = None) -> Dict[str, Any]:
+    s = session or _session()
     params = {
         "query": reg,
         "fetchBy": "reg",
@@ -401,108 +680,144 @@ def _fetch_fr_api_flights(reg: str, limit: int, session: Optional[requests.Sessi
     r = s.get(FR_API_FLIGHTS_URL, params=params, headers=headers, timeout=getattr(s, "request_timeout", 10))
     if r.status_code != 200:
         raise RuntimeError(f"FR24 API HTTP {r.status_code}")
-    js = r.json()
+    if orjson is not None:
+        return orjson.loads(r.content)
+    return r.json()
+
+
+# Key paths into the FR24 flight-list JSON, resolved once per flight
+_P_DATA = ("result", "response", "data")
+_P_FLIGHT_NUM = ("identification", "number", "default")
+_P_CALLSIGN = ("identification", "callsign")
+_P_ORIGIN = ("airport", "origin")
+_P_DESTINATION = ("airport", "destination")
+_P_NAME = ("name",)
+_P_IATA = ("code", "iata")
+_P_ICAO = ("code", "icao")
+_P_TZ_NAME = ("timezone", "name")
+_P_TZ_TZ = ("timezone", "tz")
+_P_TZ_OFFSET = ("timezone", "offset")
+_P_SCHED_DEP = ("time", "scheduled", "departure")
+_P_SCHED_ARR = ("time", "scheduled", "arrival")
+_P_REAL_DEP = ("time", "real", "departure")
+_P_REAL_ARR = ("time", "real", "arrival")
+_P_STATUS_TEXT = ("status", "text")
+_P_AIRCRAFT_INFO = ("result", "response", "aircraftInfo")
+_P_MODEL_TEXT = ("model", "text")
+_P_MODEL_CODE = ("model", "code")
+_P_AIRLINE_NAME = ("airline", "name")
+_P_AIRLINE_IATA = ("airline", "code", "iata")
+_P_AIRLINE_ICAO = ("airline", "code", "icao")
+_P_OWNER_NAME = ("owner", "name")
+_P_OWNER_IATA = ("owner", "code", "iata")
+_P_OWNER_ICAO = ("owner", "code", "icao")
+_P_HEX = ("hex",)
+
+
+def _dig(d: Any, path: Tuple[str, ...], default: Any = "") -> Any:
+    """Walk a key path; missing keys, nulls and non-dict hops all yield default."""
+    try:
+        for k in path:
+            d = d[k]
+    except (KeyError, TypeError, IndexError):
+        return default
+    return default if d is None else d
 
-    def _safe_get(d: Dict[str, Any], path: List[str], default: Any = "") -> Any:
-        cur: Any = d
-        for p in path:
-            if not isinstance(cur, dict) or p not in cur:
-                return default
-            cur = cur[p]
-        return cur
 
-    data_list = _safe_get(js, ["result", "response", "data"], [])
-    flights: List[FlightAttributes] = []
-    if not isinstance(data_list, list):
-        return flights
-
-    def _fmt_epoch(ts: Optional[int]) -> str:
-        try:
-            if not ts:
-                return ""
-            return time.strftime("%d %b %Y", time.localtime(int(ts)))
-        except Exception:
+def _fmt_epoch(ts: Optional[int]) -> str:
+    try:
+        if not ts:
             return ""
+        return time.strftime("%d %b %Y", time.localtime(int(ts)))
+    except Exception:
+        return ""
 
-    def _tzinfo_from_fields(tz_name: Any, tz_offset: Any):
-        # Try full tz database name first
-        if tz_name and isinstance(tz_name, str) and ZoneInfo is not None:
-            try:
-                return ZoneInfo(tz_name)
-            except Exception:
-                pass
-        # Fallback to numeric or string offset
-        seconds: Optional[int] = None
-        if isinstance(tz_offset, (int, float)):
-            seconds = int(tz_offset)
-        elif isinstance(tz_offset, str):
-            # Accept forms like "+02:00", "-0700", "+2", "7200"
-            s = tz_offset.strip()
-            try:
-                seconds = int(s)
-            except Exception:
-                sign = 1
-                if s.startswith("+"):
-                    s_ = s[1:]
-                elif s.startswith("-"):
-                    s_ = s[1:]
-                    sign = -1
-                else:
-                    s_ = s
-                parts = s_.split(":") if ":" in s_ else [s_[:-2], s_[-2:]] if len(s_) >= 3 and s_.isdigit() else [s_]
-                try:
-                    if len(parts) == 2:
-                        hours = int(parts[0])
-                        mins = int(parts[1])
-                        seconds = sign * (hours * 3600 + mins * 60)
-                    elif len(parts) == 1:
-                        hours = int(parts[0])
-                        seconds = sign * hours * 3600
-                except Exception:
-                    seconds = None
-        if seconds is not None:
-            try:
-                return timezone(timedelta(seconds=seconds))
-            except Exception:
-                return None
+
+@functools.lru_cache(maxsize=256)
+def _zone(name: str):
+    # ZoneInfo reads the tz database file on construction; resolve each name once
+    try:
+        return ZoneInfo(name)
+    except Exception:
+        return None
+
+
+@functools.lru_cache(maxsize=256)
+def _fixed_offset(seconds: int):
+    try:
+        return timezone(timedelta(seconds=seconds))
+    except Exception:
         return None
 
-    def _fmt_hhmm_tz(ts: Optional[int], tzinfo) -> str:
+
+# "+02:00", "-07:30", "+2", "02"
+_TZ_OFFSET_RE = re.compile(r"^([+-]?)(\d{1,2}):?(\d{2})?$")
+
+
+def _tzinfo_from_fields(tz_name: Any, tz_offset: Any):
+    # Try full tz database name first
+    if tz_name and isinstance(tz_name, str) and ZoneInfo is not None:
+        zi = _zone(tz_name)
+        if zi is not None:
+            return zi
+    # Fallback to numeric or string offset
+    seconds: Optional[int] = None
+    if isinstance(tz_offset, (int, float)):
+        seconds = int(tz_offset)
+    elif isinstance(tz_offset, str):
+        # Plain integers ("7200") are seconds; otherwise [+-]HH[:MM]
+        s = tz_offset.strip()
         try:
-            if not ts:
-                return ""
-            if tzinfo is not None:
-                dt = datetime.fromtimestamp(int(ts), tz=tzinfo)
-                return dt.strftime("%H:%M")
-            # Fallback to localtime if tz unknown
-            return time.strftime("%H:%M", time.localtime(int(ts)))
-        except Exception:
+            seconds = int(s)
+        except ValueError:
+            m = _TZ_OFFSET_RE.match(s)
+            if m:
+                sign = -1 if m.group(1) == "-" else 1
+                seconds = sign * (int(m.group(2)) * 3600 + int(m.group(3) or 0) * 60)
+    if seconds is not None:
+        return _fixed_offset(seconds)
+    return None
+
+
+def _fmt_hhmm_tz(ts: Optional[int], tzinfo) -> str:
+    try:
+        if not ts:
             return ""
+        if tzinfo is not None:
+            dt = datetime.fromtimestamp(int(ts), tz=tzinfo)
+            return dt.strftime("%H:%M")
+        # Fallback to localtime if tz unknown
+        return time.strftime("%H:%M", time.localtime(int(ts)))
+    except Exception:
+        return ""
+
+
+def _parse_fr_api_flights(js: Dict[str, Any], limit: int) -> List[FlightAttributes]:
+    data_list = _dig(js, _P_DATA, [])
+    flights: List[FlightAttributes] = []
+    if not isinstance(data_list, list):
+        return flights
 
     for item in data_list[:limit]:
-        flight_num = _safe_get(item, ["identification", "number", "default"], "").strip()
+        flight_num = _dig(item, _P_FLIGHT_NUM).strip()
         if not flight_num:
             # sometimes in historic entries it may be in callsign
-            flight_num = _safe_get(item, ["identification", "callsign"], "").strip()
+            flight_num = _dig(item, _P_CALLSIGN).strip()
 
-        org = _safe_get(item, ["airport", "origin"], {}) or {}
-        dst = _safe_get(item, ["airport", "destination"], {}) or {}
+        org = _dig(item, _P_ORIGIN, {})
+        dst = _dig(item, _P_DESTINATION, {})
 
-        from_name = _safe_get(org, ["name"], "") or _safe_get(org, ["code", "iata"], "") or _safe_get(org, ["code", "icao"], "")
-        to_name = _safe_get(dst, ["name"], "") or _safe_get(dst, ["code", "iata"], "") or _safe_get(dst, ["code", "icao"], "")
+        from_name = _dig(org, _P_NAME) or _dig(org, _P_IATA) or _dig(org, _P_ICAO)
+        to_name = _dig(dst, _P_NAME) or _dig(dst, _P_IATA) or _dig(dst, _P_ICAO)
 
         # Timezone info for origin/destination
-        org_tz_name = _safe_get(org, ["timezone", "name"], "") or _safe_get(org, ["timezone", "tz"], "")
-        org_tz_offset = _safe_get(org, ["timezone", "offset"], None)
-        dst_tz_name = _safe_get(dst, ["timezone", "name"], "") or _safe_get(dst, ["timezone", "tz"], "")
-        dst_tz_offset = _safe_get(dst, ["timezone", "offset"], None)
-        org_tzinfo = _tzinfo_from_fields(org_tz_name, org_tz_offset)
-        dst_tzinfo = _tzinfo_from_fields(dst_tz_name, dst_tz_offset)
-
-        sched_dep = _safe_get(item, ["time", "scheduled", "departure"]) or None
-        sched_arr = _safe_get(item, ["time", "scheduled", "arrival"]) or None
-        real_dep = _safe_get(item, ["time", "real", "departure"]) or None
-        real_arr = _safe_get(item, ["time", "real", "arrival"]) or None
+        org_tzinfo = _tzinfo_from_fields(_dig(org, _P_TZ_NAME) or _dig(org, _P_TZ_TZ), _dig(org, _P_TZ_OFFSET, None))
+        dst_tzinfo = _tzinfo_from_fields(_dig(dst, _P_TZ_NAME) or _dig(dst, _P_TZ_TZ), _dig(dst, _P_TZ_OFFSET, None))
+
+        sched_dep = _dig(item, _P_SCHED_DEP) or None
+        sched_arr = _dig(item, _P_SCHED_ARR) or None
+        real_dep = _dig(item, _P_REAL_DEP) or None
+        real_arr = _dig(item, _P_REAL_ARR) or None
 
         # Prefer real date if present, else scheduled
         date_epoch = real_dep or sched_dep or real_arr or sched_arr
@@ -521,7 +836,7 @@ def _fetch_fr_api_flights(reg: str, limit: int, session: Optional[requests.Sessi
             mins = int((sched_arr - sched_dep) // 60)
             flight_time = f"{mins//60:02d}:{mins%60:02d}"
 
-        status_text = _safe_get(item, ["status", "text"], "").strip()
+        status_text = _dig(item, _P_STATUS_TEXT).strip()
 
         flights.append(
             FlightAttributes(
@@ -540,6 +855,18 @@ def _fetch_fr_api_flights(reg: str, limit: int, session: Optional[requests.Sessi
     return flights
 
 
+# Fields on a JetPhotos photo page, in document order
+_JP_PHOTO_SELECTORS: List[Tuple[str, str, str, int]] = [
+    ("link", "img", "large-photo__img", 1),
+    ("text", "h4", "headerText4 color-shark", 3),
+    ("skip", "h2", "header-reset", 1),
+    ("text", "a", "link", 3),
+    ("skip", "h5", "header-reset", 1),
+    ("text", "a", "link", 1),
+    ("text", "h6", "header-reset", 1),
+]
+
+
 def scrape_jetphotos(q: APIQueries, session: Optional[requests.Session] = None) -> Tuple[JetPhotosResult, Optional[str]]:
     reg = q.Reg
     if q.Photos == 0:
@@ -583,32 +910,23 @@ def scrape_jetphotos(q: APIQueries, session: Optional[requests.Session] = None)
         phtml = fetch_html(photo_url, session=session, referer=search_url)
         ps = Scraper(phtml)
 
-        images[i].Image = ps.scrape_links("img", "large-photo__img", 1)[0]
-        if images[i].Image.startswith("//"):
-            images[i].Image = "https:" + images[i].Image
-        hdr = ps.scrape_text("h4", "headerText4 color-shark", 3)
+        img, hdr, _, trio, _, loc, who = ps.extract_bulk(_JP_PHOTO_SELECTORS)
+        images[i].Image = ("https:" + img[0]) if img[0].startswith("//") else img[0]
         images[i].DateTaken = hdr[1]
         images[i].DateUploaded = hdr[2]
-        ps.advance("h2", "header-reset", 1)
-        trio = ps.scrape_text("a", "link", 3)
         images[i].Aircraft = trio[0]
         images[i].Airline = trio[1]
         images[i].Serial = trio[2].strip()
-        ps.advance("h5", "header-reset", 1)
-        images[i].Location = ps.scrape_text("a", "link", 1)[0]
-        images[i].Photographer = ps.scrape_text("h6", "header-reset", 1)[0]
+        images[i].Location = loc[0]
+        images[i].Photographer = who[0]
 
-    if page_links:
-        with cf.ThreadPoolExecutor(max_workers=min(8, len(page_links))) as ex:
-            futs = [ex.submit(page_scraper, i, link) for i, link in enumerate(page_links)]
-            for f in cf.as_completed(futs):
-                _ = f.result()
+    _gather([lambda i=i, link=link: page_scraper(i, link) for i, link in enumerate(page_links)])
 
     return JetPhotosResult(Reg=reg.upper(), Images=images), notice
 
 
 def scrape_all(q: APIQueries) -> ScrapeResult:
-    session = get_session()
+    session = _session()
     jp_res: Optional[JetPhotosResult] = None
     fr_res: Optional[FlightRadarResult] = None
     errors: List[str] = []
@@ -616,8 +934,6 @@ def scrape_all(q: APIQueries) -> ScrapeResult:
 
     def run_jp():
         nonlocal jp_res
-        if q.OnlyFR:
-            return
         try:
             jp, note = scrape_jetphotos(q, session=session)
             jp_res = jp
@@ -628,54 +944,113 @@ def scrape_all(q: APIQueries) -> ScrapeResult:
 
     def run_fr():
         nonlocal fr_res
-        if q.OnlyJP:
-            return
         try:
             fr_res = scrape_flightradar(q, session=session)
         except Exception as e:
             errors.append(f"FlightRadar: {e}")
 
-    with cf.ThreadPoolExecutor(max_workers=2) as ex:
-        futs = [ex.submit(run_jp), ex.submit(run_fr)]
-        for f in cf.as_completed(futs):
-            try:
-                f.result()
-            except Exception as e:
-                errors.append(str(e))
+    tasks: List[Callable[[], None]] = []
+    if not q.OnlyFR:
+        tasks.append(run_jp)
+    if not q.OnlyJP:
+        tasks.append(run_fr)
+    try:
+        _gather(tasks, executor=_EXEC)
+    except Exception as e:
+        errors.append(str(e))
 
     # Never raise; return whatever we have with messages
     return ScrapeResult(JetPhotos=jp_res, FlightRadar=fr_res, Errors=errors, Notices=notices)
 
 
+# ==========================
+# Result cache
+# ==========================
+
+# Nearest-plane updates re-query the same registration for as long as it stays
+# overhead; keep successful results around for a while.
+CACHE_TTL_S = 600
+CACHE_MAXSIZE = 512
+
+_cache: "OrderedDict[Tuple[Any, ...], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_get(key: Tuple[Any, ...]) -> Optional[Dict[str, Any]]:
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is None:
+            return None
+        expires, value = hit
+        if expires <= time.monotonic():
+            del _cache[key]
+            return None
+        _cache.move_to_end(key)
+    # Callers get their own copy so they can't mutate cached state
+    return copy.deepcopy(value)
+
+
+def _cache_put(key: Tuple[Any, ...], value: Dict[str, Any]) -> None:
+    value = copy.deepcopy(value)
+    with _cache_lock:
+        _cache[key] = (time.monotonic() + CACHE_TTL_S, value)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_MAXSIZE:
+            _cache.popitem(last=False)
+
+
+def invalidate(reg: Optional[str] = None) -> None:
+    """Drop cached results for a registration (or everything when reg is None)."""
+    with _cache_lock:
+        if reg is None:
+            _cache.clear()
+            return
+        reg_u = reg.upper()
+        for key in [k for k in _cache if k[0] == reg_u]:
+            del _cache[key]
+
+
+# Field names of the result dataclasses, resolved once instead of per call
+_FIELD_NAMES: Dict[type, Tuple[str, ...]] = {
+    cls: tuple(f.name for f in dataclasses.fields(cls))
+    for cls in (FlightAttributes, FlightRadarResult, ImageAttributes, JetPhotosResult, ScrapeResult)
+}
+
+
+def _to_dict(obj: Any) -> Any:
+    names = _FIELD_NAMES.get(type(obj))
+    if names is not None:
+        return {n: _to_dict(getattr(obj, n)) for n in names}
+    if isinstance(obj, (list, tuple)):
+        return [_to_dict(x) for x in obj]
+    return obj
+
+
 # ==========================
 # Public function & CLI
 # ==========================
 
 def get_aircraft_info(registration: str, photos: int = 1, flights: int = 5,
                       only_jp: bool = False, only_fr: bool = False) -> Dict[str, Any]:
+    key = (registration.upper(), photos, flights, only_jp, only_fr)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
     q = APIQueries(Reg=registration, Photos=photos, Flights=flights, OnlyJP=only_jp, OnlyFR=only_fr)
     res = scrape_all(q)
 
-    def to_dict(obj):
-        if obj is None:
-            return None
-        if dataclasses.is_dataclass(obj):
-            d = {}
-            for f in dataclasses.fields(obj):
-                d[f.name] = to_dict(getattr(obj, f.name))
-            return d
-        if isinstance(obj, (list, tuple)):
-            return [to_dict(x) for x in obj]
-        return obj
-
     out = {
-        "JetPhotos": to_dict(res.JetPhotos),
-        "FlightRadar": to_dict(res.FlightRadar),
+        "JetPhotos": _to_dict(res.JetPhotos),
+        "FlightRadar": _to_dict(res.FlightRadar),
     }
     if res.Errors:
         out["Errors"] = res.Errors
     if res.Notices:
         out["Notices"] = res.Notices
+    # Don't pin transient failures; only clean results are cached
+    if not res.Errors:
+        _cache_put(key, out)
     return out
 
 
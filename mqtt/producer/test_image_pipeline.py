@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the image pipeline: raw BMP writer, JSONL processed-image log,
+and process_image against a mocked HTTP session (no network, no ZIPLINE_TOKEN).
+
+Run with: pytest test_image_pipeline.py
+"""
+import io
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("requests")
+pytest.importorskip("dotenv")
+
+from PIL import Image
+
+import image_processor
+import image_processor_mock
+
+ZIPLINE_CONFIG = {'url': 'https://zipline.test', 'token': 'test-token', 'folder_id': None}
+
+
+def _source_image(size, mode='RGB', fmt='PNG'):
+    """Gradient test image so resampling and letterboxing show up in the bytes."""
+    w, h = size
+    img = Image.new('RGB', size)
+    img.putdata([((x * 255) // max(w - 1, 1), (y * 255) // max(h - 1, 1), (x + y) % 256)
+                 for y in range(h) for x in range(w)])
+    if mode != 'RGB':
+        img = img.convert(mode)
+    buf = io.BytesIO()
+    img.save(buf, fmt)
+    return buf.getvalue()
+
+
+def _pillow_reference_bmp(data):
+    """What the mock converter produced before the raw writer: thumbnail, letterbox, Pillow's BMP encoder."""
+    w, h = image_processor_mock.TARGET_WIDTH, image_processor_mock.TARGET_HEIGHT
+    with Image.open(io.BytesIO(data)) as img:
+        if img.format == 'JPEG':
+            img.draft('RGB', (w * 2, h * 2))
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        if img.size != (w, h):
+            img.thumbnail((w, h), image_processor_mock.RESAMPLE_FILTER)
+        canvas = Image.new('RGB', (w, h), (0, 0, 0))
+        canvas.paste(img, ((w - img.width) // 2, (h - img.height) // 2))
+        out = io.BytesIO()
+        canvas.save(out, format='BMP')
+        return out.getvalue()
+
+
+# Run in this order on one thread so the reused letterbox canvas is exercised
+# across wide, tall, exact and same-aspect sources
+@pytest.mark.parametrize("size,mode,fmt", [
+    ((200, 100), 'RGB', 'PNG'),
+    ((100, 200), 'RGBA', 'PNG'),
+    ((96, 72), 'RGB', 'PNG'),
+    ((192, 144), 'RGB', 'PNG'),
+    ((300, 120), 'RGB', 'JPEG'),
+    ((50, 40), 'P', 'PNG'),
+])
+def test_mock_bmp_matches_pillow_encoder(size, mode, fmt):
+    data = _source_image(size, mode, fmt)
+    bmp = image_processor_mock.convert_to_bmp(io.BytesIO(data))
+    assert bmp is not None
+    assert bmp.getvalue() == _pillow_reference_bmp(data)
+
+
+def test_mock_bmp_header_is_pillow_header():
+    canvas = Image.new('RGB', (image_processor_mock.TARGET_WIDTH, image_processor_mock.TARGET_HEIGHT))
+    out = io.BytesIO()
+    canvas.save(out, format='BMP')
+    assert out.getvalue()[:54] == image_processor_mock._BMP_HEADER
+
+
+def _mock_session(image_bytes, zipline_url='https://zipline.test/u/aircraft.bmp'):
+    session = mock.Mock()
+    session.get.return_value = mock.Mock(status_code=200, content=image_bytes, headers={})
+    upload = mock.Mock(status_code=200)
+    upload.json.return_value = {'files': [{'url': zipline_url}]}
+    session.post.return_value = upload
+    return session
+
+
+@pytest.fixture
+def jsonl_log(tmp_path, monkeypatch):
+    """Point the processed-image log at tmp_path and start from an empty shared cache."""
+    path = tmp_path / 'processed_images.jsonl'
+    monkeypatch.setattr(image_processor, 'PROCESSED_URLS_FILE', str(path))
+    monkeypatch.setattr(image_processor, 'LEGACY_PROCESSED_URLS_FILE', str(tmp_path / 'processed_images.json'))
+    image_processor._processed_images_cache.clear()
+    image_processor._processed_urls_lower.clear()
+    yield path
+    image_processor._processed_images_cache.clear()
+    image_processor._processed_urls_lower.clear()
+
+
+def _processor(session):
+    processor = image_processor.ImageProcessor(zipline_config=ZIPLINE_CONFIG, use_memory_only=False)
+    processor.session = session
+    return processor
+
+
+def _records(path):
+    return [line for line in path.read_bytes().splitlines() if line.strip()]
+
+
+def test_process_image_with_mocked_session(jsonl_log):
+    session = _mock_session(_source_image((200, 150), fmt='JPEG'))
+    processor = _processor(session)
+
+    url = 'https://cdn.test/full/1/plane.jpg'
+    assert processor.process_image(url) == 'https://zipline.test/u/aircraft.bmp'
+
+    # Uploaded body is multipart carrying a 96x72 BMP with the token header
+    _, kwargs = session.post.call_args
+    assert kwargs['headers']['authorization'] == 'test-token'
+    assert b'BM' in kwargs['data']
+
+    # Second call is answered from the cache without touching the network
+    session.get.reset_mock()
+    session.post.reset_mock()
+    assert processor.get_zipline_url(url) == 'https://zipline.test/u/aircraft.bmp'
+    assert processor.process_image(url) == 'https://zipline.test/u/aircraft.bmp'
+    session.get.assert_not_called()
+    session.post.assert_not_called()
+
+
+def test_jsonl_append_and_replay(jsonl_log):
+    processor = _processor(_mock_session(_source_image((120, 90))))
+    urls = [f'https://cdn.test/full/{i}/plane.jpg' for i in range(3)]
+    for url in urls:
+        assert processor.process_image(url)
+    assert len(_records(jsonl_log)) == 3
+
+    # A fresh process replays the log into the shared cache
+    image_processor._processed_images_cache.clear()
+    image_processor._processed_urls_lower.clear()
+    replayed = _processor(mock.Mock())
+    assert list(replayed.list_processed()) == urls
+    entry = replayed.list_processed()[urls[0]]
+    assert entry['zipline_url'] == 'https://zipline.test/u/aircraft.bmp'
+    assert entry['dimensions'] == '96x72'
+    assert entry['format'] == 'BMP'
+
+
+def test_jsonl_later_records_supersede_and_compact(jsonl_log):
+    session = _mock_session(_source_image((120, 90)))
+    processor = _processor(session)
+    url = 'https://cdn.test/full/1/plane.jpg'
+
+    processor.process_image(url)
+    session.post.return_value.json.return_value = {'files': [{'url': 'https://zipline.test/u/second.bmp'}]}
+    processor.process_image(url, force=True)
+    assert len(_records(jsonl_log)) == 2
+
+    # The superseded record pushes the log past 2x the live entries: rewritten to one record
+    session.post.return_value.json.return_value = {'files': [{'url': 'https://zipline.test/u/third.bmp'}]}
+    processor.process_image(url, force=True)
+    assert len(_records(jsonl_log)) == 1
+
+    image_processor._processed_images_cache.clear()
+    image_processor._processed_urls_lower.clear()
+    assert _processor(mock.Mock()).get_zipline_url(url) == 'https://zipline.test/u/third.bmp'
+
+
+def test_compaction_keeps_records_evicted_from_the_lru(jsonl_log, monkeypatch):
+    monkeypatch.setattr(image_processor, 'MAX_CACHE', 8)
+    processor = _processor(_mock_session(_source_image((120, 90))))
+    urls = [f'https://cdn.test/full/{i}/plane.jpg' for i in range(20)]
+    for url in urls:
+        assert processor.process_image(url)
+    assert len(image_processor._processed_images_cache) == 8
+
+    # Superseding records triggers compaction; so does an explicit save
+    for url in urls[-3:]:
+        processor.process_image(url, force=True)
+    processor.save_processed_images_to_file()
+    assert len(_records(jsonl_log)) == len(urls)
+
+    image_processor._processed_images_cache.clear()
+    image_processor._processed_urls_lower.clear()
+    monkeypatch.setattr(image_processor, 'MAX_CACHE', 4096)
+    assert set(_processor(mock.Mock()).list_processed()) == set(urls)
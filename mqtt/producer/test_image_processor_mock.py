@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Offline smoke test for the mock image processor: the module must import cleanly.
+
+Run with: pytest test_image_processor_mock.py
+"""
+import logging
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("requests")
+pytest.importorskip("dotenv")
+
+
+def test_module_imports():
+    import image_processor_mock
+
+    assert isinstance(image_processor_mock.logger, logging.Logger)
+    assert callable(image_processor_mock.convert_to_bmp)
+    assert callable(image_processor_mock.process_image_mock)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Offline tests for planelookerupper helpers that need no network.
+
+Run with: pytest test_planelookerupper.py
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("requests")
+
+import planelookerupper
+
+
+@pytest.mark.parametrize("tz_offset,expected", [
+    (3600, timedelta(hours=1)),
+    (-18000.0, timedelta(hours=-5)),
+    ("7200", timedelta(hours=2)),
+    ("+02:00", timedelta(hours=2)),
+    ("-05:30", timedelta(hours=-5, minutes=-30)),
+    ("+09:30", timedelta(hours=9, minutes=30)),
+    (" -3600 ", timedelta(hours=-1)),
+])
+def test_tzinfo_from_offset(tz_offset, expected):
+    tz = planelookerupper._tzinfo_from_fields(None, tz_offset)
+    assert tz.utcoffset(None) == expected
+
+
+@pytest.mark.parametrize("tz_offset", [None, "", "bogus", "+1:2:3", [3600]])
+def test_tzinfo_unparseable_offset(tz_offset):
+    assert planelookerupper._tzinfo_from_fields(None, tz_offset) is None
+
+
+@pytest.mark.skipif(planelookerupper.ZoneInfo is None, reason="zoneinfo unavailable")
+def test_tzinfo_prefers_zone_name():
+    try:
+        planelookerupper.ZoneInfo("Europe/London")
+    except Exception:
+        pytest.skip("tz database not installed")
+    tz = planelookerupper._tzinfo_from_fields("Europe/London", 7200)
+    # Zone rules, not the fallback offset: BST in July
+    assert datetime(2024, 7, 1, 12, tzinfo=tz).utcoffset() == timedelta(hours=1)
+    # Resolved zones are cached
+    assert planelookerupper._tzinfo_from_fields("Europe/London", None) is tz
+
+
+def test_tzinfo_unknown_zone_falls_back_to_offset():
+    tz = planelookerupper._tzinfo_from_fields("Not/AZone", 3600)
+    assert tz == timezone(timedelta(hours=1))
+
+
+@pytest.mark.parametrize("scheme", ["https://", "http://"])
+def test_session_pool_sized_for_jetphotos_fanout(scheme):
+    kw = planelookerupper.get_session().get_adapter(scheme).poolmanager.connection_pool_kw
+    assert kw["maxsize"] == planelookerupper.POOL_MAXSIZE
+    assert kw["maxsize"] >= planelookerupper.JP_MAX_WORKERS
+    assert kw["block"] is False
+
+
+def test_tls_adapter_defaults_and_forwards_pool_kwargs():
+    default = planelookerupper.TLSAdapter()
+    assert default.poolmanager.connection_pool_kw["maxsize"] == planelookerupper.POOL_MAXSIZE
+    assert default._pool_connections == planelookerupper.POOL_CONNECTIONS
+
+    custom = planelookerupper.TLSAdapter(pool_connections=2, pool_maxsize=32, pool_block=True)
+    kw = custom.poolmanager.connection_pool_kw
+    assert (kw["maxsize"], kw["block"]) == (32, True)
+    assert custom._pool_connections == 2
+    # The TLS context survives the forwarded kwargs
+    assert kw["ssl_context"].minimum_version == planelookerupper.ssl.TLSVersion.TLSv1_2
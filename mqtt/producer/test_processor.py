@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Integration test for image processor + image manager against a live Zipline.
+
+Needs network access and ZIPLINE_TOKEN (root .env or environment); skipped otherwise.
+Run with: pytest test_processor.py
+"""
+import os
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("requests")
+pytest.importorskip("dotenv")
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(os.path.dirname(__file__), '..', '..', '.env'))
+if not os.getenv('ZIPLINE_TOKEN'):
+    pytest.skip("ZIPLINE_TOKEN not configured", allow_module_level=True)
+
+from image_processor import ImageProcessor
+from image_manager import get_processed_url, list_processed_images
+
+TEST_URL = "https://cdn.jetphotos.com/full/5/367779_1758341530.jpg"
+
+
+@pytest.fixture(scope="module")
+def zipline_url():
+    """Process the test image once (download, convert, upload) for every test."""
+    processor = ImageProcessor(use_memory_only=True)
+    url = processor.process_image(TEST_URL)
+    assert url, "Processing failed"
+    return url
+
+
+def _from_get(original_url):
+    return get_processed_url(original_url)
+
+
+def _from_list(original_url):
+    return list_processed_images()[original_url]['zipline_url']
+
+
+@pytest.mark.parametrize("lookup", [_from_get, _from_list], ids=["get_processed_url", "list_processed_images"])
+def test_retrieve_from_memory(zipline_url, lookup):
+    assert lookup(TEST_URL) == zipline_url
+
+
+def test_stored_metadata(zipline_url):
+    data = list_processed_images()[TEST_URL]
+    assert data['dimensions'] == "96x72"
+    assert data['format'] == 'BMP'
+    assert data['processed_date']
@@ -15,6 +15,9 @@ Usage:
 """
 
 import argparse
+import asyncio
+import hashlib
+import itertools
 import json
 import os
 import re
@@ -23,12 +26,36 @@ import time
 import random
 import logging
 import math
+import operator
+import pickle
+import sqlite3
+import struct
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Union
 from io import BytesIO
 
+try:
+    import orjson  # optional: faster catalog parsing and payload serialization
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np  # optional: vectorized distance/bearing math
+except ImportError:
+    np = None
+
+try:
+    import numba  # optional: JIT-compiled distance/bearing kernel (used together with numpy)
+except ImportError:
+    numba = None
+
 try:
     import paho.mqtt.client as mqtt
     from dotenv import load_dotenv
@@ -45,11 +72,88 @@ if root_env_path.exists():
 
 # Constants
 TIMEOUT = 15
+MQTT_MAX_INFLIGHT = 100
 UA_DEFAULT = "AirTracker/2.0 (+requests)"
 OSK_API_BASE = "https://opensky-network.org/api"
 OSK_TOKEN_URL = "https://auth.opensky-network.org/auth/realms/opensky-network/protocol/openid-connect/token"
 ADSB_API_BASE = "https://api.adsb.lol"
 FR24_API_BASE = "https://data-cloud.flightradar24.com"
+EARTH_RADIUS_NM = 3440.065
+HTTP_POOL_CONNECTIONS = 16
+HTTP_POOL_MAXSIZE = 32
+IMAGE_CONCURRENCY = 8  # aircraft images processed at once by process_aircraft_images_async
+MEDIA_LOOKUP_TIMEOUT = 60  # seconds to wait on a background planelookerupper scrape
+
+
+def build_http_session() -> requests.Session:
+    """Create a keep-alive session with pooled connections and retry on transient errors"""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE,
+                          max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _dumps(obj: Any, indent: bool = False) -> Union[str, bytes]:
+    """Serialize to JSON: orjson bytes when available, else stdlib json (compact unless indent)."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option)
+    if indent:
+        return json.dumps(obj, indent=2)
+    return json.dumps(obj, separators=(',', ':'))
+
+
+def _response_json(response: requests.Response) -> Any:
+    """Parse a response body: orjson straight from the raw bytes when available, else response.json()."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def _write_json(path: str, obj: Any):
+    """Atomically write obj as indented JSON to path (temp file + rename)."""
+    data = _dumps(obj, indent=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb' if isinstance(data, bytes) else 'w') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class _MultipartBody:
+    """Single-file multipart/form-data body read straight from the image bytes (no BytesIO copy)."""
+
+    def __init__(self, filename: str, data: bytes, content_type: str):
+        boundary = os.urandom(16).hex()
+        quoted = filename.replace('"', '%22')
+        head = (f'--{boundary}\r\n'
+                f'Content-Disposition: form-data; name="file"; filename="{quoted}"\r\n'
+                f'Content-Type: {content_type}\r\n\r\n').encode()
+        tail = f'\r\n--{boundary}--\r\n'.encode()
+        self._parts = [memoryview(head), memoryview(data), memoryview(tail)]
+        self._length = sum(len(p) for p in self._parts)
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+
+    def __len__(self) -> int:
+        # requests uses this for Content-Length, so the body is not sent chunked
+        return self._length
+
+    def read(self, size: int = -1):
+        if size is None or size < 0:
+            out = b''.join(self._parts)
+            self._parts = []
+            return out
+        while self._parts:
+            part = self._parts[0]
+            if len(part) > size:
+                self._parts[0] = part[size:]
+                return part[:size]
+            self._parts.pop(0)
+            if len(part):
+                return part
+        return b''
 
 
 def sanitize_float(s: str) -> float:
@@ -57,6 +161,77 @@ def sanitize_float(s: str) -> float:
     return float(s.replace(',', '.'))
 
 
+class ImageURLCache:
+    """Persistent cache of Zipline URLs per source image, keyed by SHA-1 of the image URL
+    and by SHA-256 of the downloaded bytes (identical images behind different URLs)"""
+
+    _TABLES = ("images", "contents")
+
+    def __init__(self, cache_path: str, ttl: int = 30 * 86400, partial_ttl: int = 3600):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        # An entry missing one upload (e.g. a failed BMP conversion) is retried after this
+        self.partial_ttl = partial_ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        for table in self._TABLES:
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, orig_url TEXT, esp32_url TEXT, ts REAL)"
+            )
+        self.conn.commit()
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha1(url.encode()).hexdigest()
+
+    @staticmethod
+    def content_digest(image_data: bytes) -> str:
+        return hashlib.sha256(image_data).hexdigest()
+
+    def _lookup(self, table: str, key: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT orig_url, esp32_url, ts FROM {table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        ttl = self.ttl if row[0] and row[1] else self.partial_ttl
+        if time.time() - row[2] >= ttl:
+            return None
+        result = {}
+        if row[0]:
+            result['plane_image_zipline_original'] = row[0]
+        if row[1]:
+            result['plane_image_zipline_esp32'] = row[1]
+        return result
+
+    def get(self, url: str) -> Optional[Dict[str, str]]:
+        """Return cached Zipline URLs for an image URL, or None if missing/expired"""
+        return self._lookup("images", self._key(url))
+
+    def get_by_digest(self, digest: str) -> Optional[Dict[str, str]]:
+        """Return cached Zipline URLs for image content already uploaded under another URL"""
+        return self._lookup("contents", digest)
+
+    def put(self, url: str, result: Dict[str, str], digest: Optional[str] = None):
+        """Store the Zipline URLs produced for an image URL (and its content digest)"""
+        row = (result.get('plane_image_zipline_original'), result.get('plane_image_zipline_esp32'), time.time())
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO images (key, orig_url, esp32_url, ts) VALUES (?, ?, ?, ?)",
+                (self._key(url),) + row
+            )
+            if digest:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO contents (key, orig_url, esp32_url, ts) VALUES (?, ?, ?, ?)",
+                    (digest,) + row
+                )
+            self.conn.commit()
+
+
 # Image processing functionality (embedded from image_processor.py)
 class AircraftImageProcessor:
     """Handles image download, conversion, and Zipline upload for aircraft images."""
@@ -64,12 +239,31 @@ class AircraftImageProcessor:
     TARGET_WIDTH = 96
     TARGET_HEIGHT = 72
     BMP_BITS_PER_PIXEL = 24
+    # 96 * 3 = 288 bytes per row is already 4-byte aligned, so rows need no padding
+    _BMP_ROW_BYTES = TARGET_WIDTH * 3
+    _BMP_IMAGE_BYTES = _BMP_ROW_BYTES * TARGET_HEIGHT
+    _BMP_HEADER = (
+        struct.pack('<2sIHHI', b'BM', 54 + _BMP_IMAGE_BYTES, 0, 0, 54)
+        + struct.pack('<IiiHHIIiiII', 40, TARGET_WIDTH, TARGET_HEIGHT, 1, BMP_BITS_PER_PIXEL,
+                      0, _BMP_IMAGE_BYTES, 3780, 3780, 0, 0)
+    )
+    MAX_IMAGE_BYTES = 4 * 1024 * 1024  # refuse oversized source images
+    DOWNLOAD_CHUNK_SIZE = 32768
 
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, session: Optional[requests.Session] = None):
         """Initialize with configuration from environment."""
         self.config = config
+        self.http = session or build_http_session()
         self.setup_zipline()
         self.processed_cache = {}  # In-memory cache for this session
+        self.start_cycle()
+        # Survives restarts so known images skip download, resize and upload
+        self.url_cache = ImageURLCache(str(Path.cwd() / 'data' / 'image_cache.sqlite3'))
+
+    def start_cycle(self):
+        """Stamp uploads of the coming pipeline cycle with one timestamp plus a sequence number."""
+        self._cycle_ts = time.strftime("%Y%m%d_%H%M%S")
+        self._upload_seq = itertools.count()
 
     def setup_zipline(self):
         """Configure Zipline from environment variables."""
@@ -95,10 +289,23 @@ class AircraftImageProcessor:
                 'Accept': 'image/*'
             }
 
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
+            # Stream into a bounded buffer so oversized payloads fail fast
+            with self.http.get(url, headers=headers, stream=True, timeout=30) as response:
+                response.raise_for_status()
 
-            return response.content
+                declared = response.headers.get('Content-Length')
+                if declared and declared.isdigit() and int(declared) > self.MAX_IMAGE_BYTES:
+                    raise ValueError(f"image too large ({declared} bytes)")
+
+                buf = BytesIO()
+                received = 0
+                for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                    received += len(chunk)
+                    if received > self.MAX_IMAGE_BYTES:
+                        raise ValueError(f"image exceeds {self.MAX_IMAGE_BYTES} bytes")
+                    buf.write(chunk)
+
+            return buf.getvalue()
 
         except Exception as e:
             if self.config.get('log_level') == 'DEBUG':
@@ -108,9 +315,11 @@ class AircraftImageProcessor:
     def convert_to_bmp(self, image_data: bytes) -> Optional[bytes]:
         """Convert image to 96x72 24-bit BMP format."""
         try:
-            # Open image from bytes
-            from io import BytesIO
+            # BytesIO wraps the downloaded bytes without copying them
             with Image.open(BytesIO(image_data)) as img:
+                # Let the JPEG decoder scale down by a power of two while decoding
+                img.draft('RGB', (self.TARGET_WIDTH * 2, self.TARGET_HEIGHT * 2))
+
                 # Convert to RGB (24-bit)
                 if img.mode != 'RGB':
                     img = img.convert('RGB')
@@ -126,10 +335,8 @@ class AircraftImageProcessor:
                 y = (self.TARGET_HEIGHT - img.height) // 2
                 new_img.paste(img, (x, y))
 
-                # Save as BMP to BytesIO
-                bmp_buffer = BytesIO()
-                new_img.save(bmp_buffer, 'BMP')
-                return bmp_buffer.getvalue()
+                # Emit the fixed 54-byte header plus bottom-up BGR rows directly
+                return self._BMP_HEADER + new_img.tobytes('raw', 'BGR', 0, -1)
 
         except Exception as e:
             if self.config.get('log_level') == 'DEBUG':
@@ -150,22 +357,21 @@ class AircraftImageProcessor:
             if self.zipline_folder_id:
                 headers['x-zipline-folder'] = self.zipline_folder_id
 
-            # Create meaningful filename with timestamp and type
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            # Create meaningful filename with cycle timestamp, upload sequence and type
             suffix = "_esp32" if is_bmp else "_original"
             clean_filename = os.path.splitext(filename)[0]
-            final_filename = f"aircraft_{timestamp}_{clean_filename}{suffix}.{'bmp' if is_bmp else 'jpg'}"
+            ext = 'bmp' if is_bmp else 'jpg'
+            final_filename = f"aircraft_{self._cycle_ts}_{next(self._upload_seq)}_{clean_filename}{suffix}.{ext}"
 
             content_type = 'image/bmp' if is_bmp else 'image/jpeg'
 
-            files = {
-                'file': (final_filename, BytesIO(image_data), content_type)
-            }
+            body = _MultipartBody(final_filename, image_data, content_type)
+            headers['Content-Type'] = body.content_type
 
-            response = requests.post(
+            response = self.http.post(
                 upload_url,
                 headers=headers,
-                files=files,
+                data=body,
                 timeout=30
             )
 
@@ -190,49 +396,75 @@ class AircraftImageProcessor:
                 print(f"❌ Zipline upload failed: {e}")
             return None
 
-    def process_aircraft_image(self, image_url: str, aircraft_reg: str) -> Dict[str, Optional[str]]:
-        """Process an aircraft image: download, upload original, convert to BMP, upload BMP."""
+    def _cached_result(self, image_url: str, aircraft_reg: str) -> Optional[Dict[str, Optional[str]]]:
+        """Return URLs from the session or persistent cache, if present."""
+        if image_url in self.processed_cache:
+            if self.config.get('log_level') == 'DEBUG':
+                print(f"⏭️  Using cached image URLs for {aircraft_reg}")
+            return self.processed_cache[image_url]
+
+        cached = self.url_cache.get(image_url)
+        if cached:
+            if self.config.get('log_level') == 'DEBUG':
+                print(f"⏭️  Using persisted image URLs for {aircraft_reg}")
+            if self._is_complete(cached):
+                self.processed_cache[image_url] = cached
+            return cached
+        return None
+
+    @staticmethod
+    def _is_complete(result: Dict[str, Optional[str]]) -> bool:
+        return bool(result.get('plane_image_zipline_original') and result.get('plane_image_zipline_esp32'))
+
+    def _convert_and_upload_bmp(self, image_data: bytes, aircraft_reg: str) -> Optional[str]:
+        bmp_data = self.convert_to_bmp(image_data)
+        if not bmp_data:
+            return None
+        return self.upload_to_zipline(bmp_data, aircraft_reg, is_bmp=True)
+
+    async def process_aircraft_image_async(self, image_url: str, aircraft_reg: str) -> Dict[str, Optional[str]]:
+        """Download, then upload the original while the BMP is converted and uploaded."""
         if not self.enabled:
             return {}
 
-        # Check cache first
-        cache_key = image_url
-        if cache_key in self.processed_cache:
-            if self.config.get('log_level') == 'DEBUG':
-                print(f"⏭️  Using cached image URLs for {aircraft_reg}")
-            return self.processed_cache[cache_key]
+        cached = self._cached_result(image_url, aircraft_reg)
+        if cached is not None:
+            return cached
 
         result = {}
 
         try:
             # Download original image
-            image_data = self.download_image(image_url)
+            image_data = await asyncio.to_thread(self.download_image, image_url)
             if not image_data:
                 return result
 
-            # Upload original to Zipline
-            original_zipline_url = self.upload_to_zipline(
-                image_data,
-                aircraft_reg,
-                is_bmp=False
+            # Same bytes already uploaded under another URL (CDN variants): reuse those URLs
+            digest = self.url_cache.content_digest(image_data)
+            known = self.url_cache.get_by_digest(digest)
+            if known:
+                if self.config.get('log_level') == 'DEBUG':
+                    print(f"⏭️  Reusing uploads of identical image content for {aircraft_reg}")
+                if self._is_complete(known):
+                    self.processed_cache[image_url] = known
+                self.url_cache.put(image_url, known, digest)
+                return known
+
+            # The original upload and the Pillow resize + BMP upload are independent
+            original_zipline_url, bmp_zipline_url = await asyncio.gather(
+                asyncio.to_thread(self.upload_to_zipline, image_data, aircraft_reg, False),
+                asyncio.to_thread(self._convert_and_upload_bmp, image_data, aircraft_reg),
             )
             if original_zipline_url:
                 result['plane_image_zipline_original'] = original_zipline_url
+            if bmp_zipline_url:
+                result['plane_image_zipline_esp32'] = bmp_zipline_url
 
-            # Convert to BMP
-            bmp_data = self.convert_to_bmp(image_data)
-            if bmp_data:
-                # Upload BMP to Zipline
-                bmp_zipline_url = self.upload_to_zipline(
-                    bmp_data,
-                    aircraft_reg,
-                    is_bmp=True
-                )
-                if bmp_zipline_url:
-                    result['plane_image_zipline_esp32'] = bmp_zipline_url
-
-            # Cache the result
-            self.processed_cache[cache_key] = result
+            # Cache the result (partial results only persist briefly, so they get retried)
+            if self._is_complete(result):
+                self.processed_cache[image_url] = result
+            if result:
+                self.url_cache.put(image_url, result, digest)
 
             return result
 
@@ -241,6 +473,39 @@ class AircraftImageProcessor:
                 print(f"❌ Image processing failed for {aircraft_reg}: {e}")
             return result
 
+    async def process_aircraft_images_async(self, items: List[Tuple[str, str]],
+                                            concurrency: int = IMAGE_CONCURRENCY) -> List[Dict[str, Optional[str]]]:
+        """Process (image_url, registration) pairs concurrently; results keep input order."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _one(image_url: str, aircraft_reg: str) -> Dict[str, Optional[str]]:
+            async with semaphore:
+                return await self.process_aircraft_image_async(image_url, aircraft_reg)
+
+        # Each distinct URL is processed once, even if several items share it
+        first_reg = {}
+        for url, reg in items:
+            first_reg.setdefault(url, reg)
+        done = await asyncio.gather(*(_one(url, reg) for url, reg in first_reg.items()))
+        by_url = dict(zip(first_reg, done))
+        return [by_url[url] for url, _ in items]
+
+    def process_aircraft_images(self, items: List[Tuple[str, str]]) -> List[Dict[str, Optional[str]]]:
+        """Synchronous entry point: one event loop for the whole batch."""
+        if not self.enabled:
+            return [{} for _ in items]
+        results = [self._cached_result(url, reg) for url, reg in items]
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            fresh = asyncio.run(self.process_aircraft_images_async([items[i] for i in misses]))
+            for i, result in zip(misses, fresh):
+                results[i] = result
+        return results
+
+    def process_aircraft_image(self, image_url: str, aircraft_reg: str) -> Dict[str, Optional[str]]:
+        """Process an aircraft image: download, upload original, convert to BMP, upload BMP."""
+        return self.process_aircraft_images([(image_url, aircraft_reg)])[0]
+
 
 def nm_to_deg(lat_deg: float, radius_nm: float) -> Tuple[float, float]:
     """Convert nautical miles to degrees at given latitude"""
@@ -255,9 +520,99 @@ def bbox_from_point(lat: float, lon: float, radius_nm: float) -> Tuple[float, fl
     return lat + lat_delta, lat - lat_delta, lon - lon_delta, lon + lon_delta
 
 
-def get_opensky_token(client_id: str, client_secret: str) -> str:
+def bbox_from_points(lats, lons, radius_nm: float):
+    """Vectorized bbox_from_point: (north, south, west, east) arrays for many centers (needs numpy)."""
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    lat_delta = radius_nm / 60.0
+    lon_delta = radius_nm / (60.0 * np.cos(np.radians(lats)))
+    return lats + lat_delta, lats - lat_delta, lons - lon_delta, lons + lon_delta
+
+
+if numba is not None and np is not None:
+    @numba.njit(cache=True, fastmath=True, parallel=True)
+    def _haversine_bearing_batch(lat0, lon0, lats, lons):
+        """Distance (nm) and bearing (deg) arrays from (lat0, lon0) in degrees to every point."""
+        n = lats.size
+        dist = np.empty(n)
+        bearing = np.empty(n)
+        lat1 = np.radians(lat0)
+        lon1 = np.radians(lon0)
+        sin_lat1 = np.sin(lat1)
+        cos_lat1 = np.cos(lat1)
+        for i in numba.prange(n):
+            lat2 = np.radians(lats[i])
+            dlat = lat2 - lat1
+            dlon = np.radians(lons[i]) - lon1
+            cos_lat2 = np.cos(lat2)
+            a = np.sin(dlat / 2) ** 2 + cos_lat1 * cos_lat2 * np.sin(dlon / 2) ** 2
+            dist[i] = EARTH_RADIUS_NM * 2 * np.arcsin(np.sqrt(a))
+            y = np.sin(dlon) * cos_lat2
+            x = cos_lat1 * np.sin(lat2) - sin_lat1 * cos_lat2 * np.cos(dlon)
+            bearing[i] = (np.degrees(np.arctan2(y, x)) + 360) % 360
+        return dist, bearing
+else:
+    _haversine_bearing_batch = None
+
+
+def gc_distance_nm(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Calculate great circle distance in nautical miles"""
+    lat1_rad, lat2_rad = math.radians(lat1), math.radians(lat2)
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon/2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return EARTH_RADIUS_NM * c
+
+
+def ranges_from_point(lat0: float, lon0: float, lats: List[float], lons: List[float]) -> Tuple[List[float], List[float]]:
+    """Great-circle distance (nm) and initial bearing (deg) from one point to many."""
+    if _haversine_bearing_batch is not None:
+        dist, bearing = _haversine_bearing_batch(float(lat0), float(lon0),
+                                                 np.asarray(lats, dtype=np.float64),
+                                                 np.asarray(lons, dtype=np.float64))
+        return dist.tolist(), bearing.tolist()
+
+    if np is not None:
+        lat1, lon1 = math.radians(lat0), math.radians(lon0)
+        lat2 = np.radians(np.asarray(lats, dtype=float))
+        dlon = np.radians(np.asarray(lons, dtype=float)) - lon1
+        dlat = lat2 - lat1
+        cos_lat2 = np.cos(lat2)
+        a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * cos_lat2 * np.sin(dlon / 2) ** 2
+        dist = EARTH_RADIUS_NM * 2 * np.arcsin(np.sqrt(a))
+        y = np.sin(dlon) * cos_lat2
+        x = math.cos(lat1) * np.sin(lat2) - math.sin(lat1) * cos_lat2 * np.cos(dlon)
+        bearing = (np.degrees(np.arctan2(y, x)) + 360) % 360
+        return dist.tolist(), bearing.tolist()
+
+    lat1, lon1 = math.radians(lat0), math.radians(lon0)
+    dists, bearings = [], []
+    for lat, lon in zip(lats, lons):
+        lat2, lon2 = math.radians(lat), math.radians(lon)
+        dlat = lat2 - lat1
+        dlon = lon2 - lon1
+        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
+        dists.append(EARTH_RADIUS_NM * 2 * math.asin(math.sqrt(a)))
+        y = math.sin(dlon) * math.cos(lat2)
+        x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(dlon)
+        bearings.append((math.degrees(math.atan2(y, x)) + 360) % 360)
+    return dists, bearings
+
+
+# OpenSky state vector fields used by fetch_opensky, extracted in one call
+_OSK_GET = operator.itemgetter(0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 13)
+_OSK_STATE_MIN_LEN = 14
+# State vectors carry SI units; fields are numeric or null per the OpenSky API
+_M_TO_FT = 3.28084
+_MS_TO_KT = 1.94384
+_MS_TO_FPM = 196.85
+
+
+def get_opensky_token(client_id: str, client_secret: str,
+                      session: Optional[requests.Session] = None) -> str:
     """Get OAuth token for OpenSky Network API"""
-    response = requests.post(OSK_TOKEN_URL, data={
+    response = (session or requests).post(OSK_TOKEN_URL, data={
         "grant_type": "client_credentials",
         "client_id": client_id,
         "client_secret": client_secret,
@@ -304,14 +659,15 @@ def _datasets_root() -> str:
 def _load_jsonl_map(path: str, key_field: str) -> Dict[str, dict]:
     """Load JSONL file into a dictionary keyed by specified field."""
     m: Dict[str, dict] = {}
+    loads = orjson.loads if orjson is not None else json.loads
     try:
-        with open(path, "r", encoding="utf-8") as f:
+        with open(path, "rb") as f:
             for ln in f:
                 ln = ln.strip()
                 if not ln:
                     continue
                 try:
-                    obj = json.loads(ln)
+                    obj = loads(ln)
                 except Exception:
                     continue
                 k = obj.get(key_field)
@@ -322,96 +678,115 @@ def _load_jsonl_map(path: str, key_field: str) -> Dict[str, dict]:
     return m
 
 
-def _load_catalogs(ds_root: Optional[str] = None) -> Dict[str, Dict[str, dict]]:
-    """Load all dataset catalogs for enrichment."""
-    ds = ds_root or _datasets_root()
-    cats = {
-        "aircraft": _load_jsonl_map(os.path.join(ds, "aircraft_types_full.jsonl"), "icao"),
-        "airlines_by_icao": _load_jsonl_map(os.path.join(ds, "airlines.jsonl"), "icao"),
-        "airlines_by_iata": {},
-        "airports": _load_jsonl_map(os.path.join(ds, "airports.jsonl"), "iata"),
-        "countries": _load_jsonl_map(os.path.join(ds, "countries.jsonl"), "code"),
-    }
+def _load_jsonl_map_fast(path: str, key_field: str) -> Dict[str, dict]:
+    """Like _load_jsonl_map, but reuse a pickled copy next to the file while its mtime/size match."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    stamp = (st.st_mtime_ns, st.st_size, key_field)
+    pkl_path = path + ".pkl"
+    try:
+        with open(pkl_path, "rb") as f:
+            cached = pickle.load(f)
+        if cached.get("stamp") == stamp:
+            return cached["map"]
+    except Exception:
+        pass  # missing, stale format or unreadable: rebuild below
+
+    m = _load_jsonl_map(path, key_field)
+    try:
+        tmp_path = pkl_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"stamp": stamp, "map": m}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, pkl_path)
+    except OSError:
+        pass  # read-only datasets dir; parse again next start
+    return m
+
+
+# (catalog key, file name, key field) for every dataset catalog
+_CATALOG_FILES = (
+    ("aircraft", "aircraft_types_full.jsonl", "icao"),
+    ("airlines_by_icao", "airlines.jsonl", "icao"),
+    ("airports", "airports.jsonl", "iata"),
+    ("countries", "countries.jsonl", "code"),
+)
+
+
+def _file_mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+@lru_cache(maxsize=4)
+def _load_catalogs_cached(ds: str, stamp: Tuple[float, ...]) -> Dict[str, Dict[str, dict]]:
+    """Build the catalogs once per datasets dir and file mtimes; callers must not mutate them."""
+    cats = {name: _load_jsonl_map_fast(os.path.join(ds, fname), key) for name, fname, key in _CATALOG_FILES}
     # Build IATA index for airlines
+    cats["airlines_by_iata"] = {}
     for icao, a in cats["airlines_by_icao"].items():
         iata = a.get("iata")
         if isinstance(iata, str) and iata:
             cats["airlines_by_iata"][iata] = a
+    cats["views"] = _build_lookup_views(cats)
     return cats
 
 
+def _load_catalogs(ds_root: Optional[str] = None) -> Dict[str, Dict[str, dict]]:
+    """Load all dataset catalogs for enrichment (memoized until a catalog file changes)."""
+    ds = ds_root or _datasets_root()
+    stamp = tuple(_file_mtime(os.path.join(ds, fname)) for _, fname, _ in _CATALOG_FILES)
+    return _load_catalogs_cached(ds, stamp)
+
+
+# Seat heuristics for common ICAO type codes: exact codes first, then the
+# longest matching prefix (4, 3, then 2 characters)
+SEAT_EXACT = {
+    "B350": 11, "PRM1": 6, "GALX": 10, "MU30": 8,
+    "H25A": 8, "H25B": 8, "H25C": 8,
+    "FA10": 8, "FA20": 12, "FA8X": 19,
+    # Cessna singles/twins common
+    "C120": 2, "C140": 2, "C180": 4, "C185": 6, "C188": 1, "C210": 6, "C310": 6,
+    # C195 falls under the C19 prefix (4 seats)
+}
+SEAT_PREFIX = {
+    "A31": 244, "A32": 244,  # A321neo upper bound
+    "B70": 189,  # 707 family
+    "B72": 189,  # 727 family
+    "B73": 230,  # 737 family upper bound
+    "B78": 330,  # 787 family
+    "E17": 146, "E19": 146, "E29": 146, "E75": 146,  # E-Jets / E2 upper bound
+    "CRJ": 104,
+    "AT4": 78, "AT7": 78,  # ATR 42/72
+    "DH8": 90,
+    "DH2": 7,  # Beaver
+    "TISB": 6,
+    # GA / Bizjet common types
+    "BE33": 4, "BE35": 4, "BE36": 4,
+    "BE55": 6, "BE56": 6, "BE58": 6,
+    "BE76": 4, "BE77": 4, "BE80": 4, "BE95": 4,
+    "BE9": 9, "BE10": 9,  # King Air 90/100
+    "LJ": 9,
+    "C17": 4, "C15": 4, "C19": 4,
+}
+
+
+@lru_cache(maxsize=1024)
 def _estimate_seat_max(icao: Optional[str]) -> Optional[int]:
-    """Estimate maximum seats based on aircraft ICAO type code."""
+    """Estimate maximum seats based on aircraft ICAO type code (memoized; type codes repeat every cycle)."""
     if not icao:
         return None
     t = icao.upper()
-    # Heuristics for common aircraft types
-    if t.startswith(("A31", "A32")):
-        return 244  # A321neo upper bound
-    if t.startswith("B70"):
-        return 189  # 707 family
-    if t.startswith("B72"):
-        return 189  # 727 family
-    if t.startswith("B73"):
-        return 230  # 737 family upper bound
-    if t.startswith("B78"):
-        return 330  # 787 family
-    if t.startswith(("E17", "E19", "E29", "E75")):
-        return 146  # E-Jets / E2 upper bound
-    if t.startswith("CRJ"):
-        return 104
-    if t.startswith(("AT4", "AT7")):
-        return 78  # ATR 42/72
-    if t.startswith("DH8"):
-        return 90
-    if t.startswith("DH2"):
-        return 7   # Beaver
-    if t.startswith("TISB"):
-        return 6
-    # GA / Bizjet common types
-    if t.startswith(("BE33", "BE35", "BE36")):
-        return 4
-    if t.startswith(("BE55", "BE56", "BE58")):
-        return 6
-    if t.startswith(("BE76", "BE77", "BE80", "BE95")):
-        return 4
-    if t.startswith("BE9") or t.startswith("BE10"):
-        return 9  # King Air 90/100
-    if t == "B350":
-        return 11
-    if t.startswith("LJ"):
-        return 9
-    if t == "PRM1":
-        return 6
-    if t == "GALX":
-        return 10
-    if t == "MU30":
-        return 8
-    if t in ("H25A", "H25B", "H25C"):
-        return 8
-    if t == "FA10":
-        return 8
-    if t == "FA20":
-        return 12
-    if t == "FA8X":
-        return 19
-    # Cessna singles/twins common
-    if t in ("C120", "C140"):
-        return 2
-    if t.startswith(("C17", "C15", "C19")):
-        return 4
-    if t == "C180":
-        return 4
-    if t == "C185":
-        return 6
-    if t == "C188":
-        return 1
-    if t == "C195":
-        return 5
-    if t == "C210":
-        return 6
-    if t == "C310":
-        return 6
+    v = SEAT_EXACT.get(t)
+    if v is not None:
+        return v
+    for n in (4, 3, 2):
+        v = SEAT_PREFIX.get(t[:n])
+        if v is not None:
+            return v
     return None
 
 
@@ -423,34 +798,33 @@ def _private_threshold_default() -> int:
         return 8
 
 
+# Known military aircraft type codes
+MILITARY_TYPES = frozenset({
+    # US Military helicopters
+    'H60', 'UH60', 'HH60', 'MH60', 'SH60',  # Blackhawk variants
+    'UH1', 'UH1N', 'UH1Y',  # Huey variants
+    'AH64', 'AH6',  # Apache, Little Bird
+    'CH47', 'CH53',  # Chinook, Stallion
+    'MV22', 'CV22',  # Osprey variants
+
+    # US Military fixed wing
+    'C130', 'C17', 'C5', 'KC135', 'KC46',  # Transport/tanker
+    'F16', 'F18', 'F22', 'F35',  # Fighters
+    'A10', 'B52', 'B1', 'B2',  # Attack/bombers
+    'E3', 'E2', 'P3', 'P8',  # AWACS/patrol
+    'U2', 'RQ4',  # Reconnaissance
+
+    # Other common military designations
+    'T6', 'T38', 'T45',  # Trainers
+})
+
+
 def is_military_aircraft_type(aircraft_type: str) -> bool:
     """Check if aircraft type code indicates military aircraft"""
     if not aircraft_type:
         return False
 
-    aircraft_type = aircraft_type.upper().strip()
-
-    # Known military aircraft type codes
-    military_types = {
-        # US Military helicopters
-        'H60', 'UH60', 'HH60', 'MH60', 'SH60',  # Blackhawk variants
-        'UH1', 'UH1N', 'UH1Y',  # Huey variants
-        'AH64', 'AH6',  # Apache, Little Bird
-        'CH47', 'CH53',  # Chinook, Stallion
-        'MV22', 'CV22',  # Osprey variants
-
-        # US Military fixed wing
-        'C130', 'C17', 'C5', 'KC135', 'KC46',  # Transport/tanker
-        'F16', 'F18', 'F22', 'F35',  # Fighters
-        'A10', 'B52', 'B1', 'B2',  # Attack/bombers
-        'E3', 'E2', 'P3', 'P8',  # AWACS/patrol
-        'U2', 'RQ4',  # Reconnaissance
-
-        # Other common military designations
-        'T6', 'T38', 'T45',  # Trainers
-    }
-
-    return aircraft_type in military_types
+    return aircraft_type.upper().strip() in MILITARY_TYPES
 
 
 def classify_aircraft(row: Dict[str, Any], private_threshold: Optional[int] = None) -> Optional[str]:
@@ -469,7 +843,7 @@ def classify_aircraft(row: Dict[str, Any], private_threshold: Optional[int] = No
         if not isinstance(seats, int):
             seats = None
         if seats is None:
-            seats = _estimate_seat_max(_clean_str(row.get("aircraft_type")))
+            seats = _estimate_seat_max(aircraft_type)
 
         if seats is None:
             return None
@@ -480,7 +854,10 @@ def classify_aircraft(row: Dict[str, Any], private_threshold: Optional[int] = No
         return None
 
 
-IATA_FLIGHT_RE = re.compile(r"^[A-Z0-9]{2,3}\d{1,4}[A-Z]?$")
+# One match validates an IATA flight number and yields its airline prefix; the lazy
+# {2,3}? prefers the 2-char airline code ("BA123" -> "BA")
+_PREFIX_RE = re.compile(r"^(?P<pref>[A-Z0-9]{2,3}?)\d{1,4}[A-Z]?$")
+IATA_FLIGHT_RE = _PREFIX_RE  # backward-compatible name
 
 
 def looks_like_iata_flight(s: Optional[str]) -> bool:
@@ -489,41 +866,100 @@ def looks_like_iata_flight(s: Optional[str]) -> bool:
     return bool(s and IATA_FLIGHT_RE.match(s))
 
 
+def _flight_no_prefix(flight_no: Optional[str]) -> Optional[str]:
+    """Return the airline IATA prefix of a flight number, or None if it doesn't look like one."""
+    m = _PREFIX_RE.match(_clean_str(flight_no) or "")
+    return m["pref"] if m else None
+
+
 def _airline_from_flight_no(flight_no: Optional[str], cats: Dict[str, Dict[str, dict]]) -> Optional[dict]:
     """Extract airline from flight number using IATA code mapping."""
-    if not looks_like_iata_flight(flight_no):
-        return None
-    # Prefix is 2 or 3 alnum chars before the digits
-    s = flight_no.strip()
-    m2 = re.match(r"^([A-Z0-9]{2,3})\d", s)
-    if not m2:
+    pref = _flight_no_prefix(flight_no)
+    if not pref:
         return None
-    pref = m2.group(1)
     return cats.get("airlines_by_iata", {}).get(pref)
 
 
-def enrich_with_catalogs(row: Dict[str, Any], cats: Dict[str, Dict[str, dict]]) -> Dict[str, Any]:
-    """Enrich aircraft data with additional information from datasets."""
-    out = dict(row)
+def _airline_view(airline: dict) -> Dict[str, Any]:
+    return {
+        "icao": airline.get("icao"),
+        "iata": airline.get("iata"),
+        "name": airline.get("name"),
+        "callsign": airline.get("callsign"),
+        "country_code": airline.get("country_code"),
+        "country_name": airline.get("country_name"),
+    }
+
+
+def _build_lookup_views(cats: Dict[str, Dict[str, dict]]) -> Dict[str, Dict[str, Any]]:
+    """Project catalog records once into the lookup dicts enrich_with_catalogs emits per row."""
+    views: Dict[str, Dict[str, Any]] = {
+        "aircraft": {}, "seats": {}, "airlines_by_icao": {}, "airlines_by_iata": {}, "airports": {},
+        "airport_latlon": {},
+    }
+    for icao, a in cats.get("aircraft", {}).items():
+        views["aircraft"][icao] = {
+            "icao": icao,
+            "name": a.get("name") or a.get("model") or icao,
+            "manufacturer": a.get("manufacturer"),
+            "model": a.get("model"),
+            "seats_max": a.get("seats"),
+            "iata_aliases": a.get("iata") or [],
+            "lookup_status": "found",
+        }
+        if isinstance(a.get("seats"), int) and a.get("seats", 0) > 0:
+            views["seats"][icao] = int(a["seats"])
+
+    for icao, airline in cats.get("airlines_by_icao", {}).items():
+        views["airlines_by_icao"][icao] = _airline_view(airline)
+    for iata, airline in cats.get("airlines_by_iata", {}).items():
+        views["airlines_by_iata"][iata] = _airline_view(airline)
+
+    countries = cats.get("countries", {})
+    for iata, a in cats.get("airports", {}).items():
+        view = {
+            "iata": a.get("iata"),
+            "name": a.get("name"),
+            "city": a.get("city"),
+            "region": a.get("region"),
+            "country_code": a.get("country_code"),
+            "country_name": a.get("country_name"),
+            "lat": a.get("lat"),
+            "lon": a.get("lon"),
+            "elevation_ft": a.get("elevation_ft"),
+        }
+        # Country by code (fallback if not present via airport)
+        if not view["country_name"] and view["country_code"]:
+            c = countries.get(view["country_code"])
+            if c:
+                view["country_name"] = c.get("name")
+        views["airports"][iata] = view
+        if isinstance(view["lat"], (int, float)) and isinstance(view["lon"], (int, float)):
+            views["airport_latlon"][iata] = (float(view["lat"]), float(view["lon"]))
+    return views
+
+
+def enrich_with_catalogs(row: Dict[str, Any], cats: Dict[str, Dict[str, dict]], *,
+                         inplace: bool = False) -> Dict[str, Any]:
+    """Enrich aircraft data with additional information from datasets.
+
+    Only the souls_on_board_max* fields and "lookups" are written; with inplace=True they
+    are set on row itself instead of on a shallow copy.
+    """
+    out = row if inplace else dict(row)
     lookups: Dict[str, Any] = {}
+    # Per-catalog projections built at load time: one dict probe + copy per lookup
+    views = cats.get("views")
+    if views is None:
+        views = cats["views"] = _build_lookup_views(cats)
 
     # Aircraft by ICAO type
     icao_type = _clean_str(row.get("aircraft_type"))
     if icao_type:
-        a = cats.get("aircraft", {}).get(icao_type)
-        seat_actual: Optional[int] = None
-        if a:
-            lookups["aircraft"] = {
-                "icao": icao_type,
-                "name": a.get("name") or a.get("model") or icao_type,
-                "manufacturer": a.get("manufacturer"),
-                "model": a.get("model"),
-                "seats_max": a.get("seats"),
-                "iata_aliases": a.get("iata") or [],
-                "lookup_status": "found",
-            }
-            if isinstance(a.get("seats"), int) and a.get("seats", 0) > 0:
-                seat_actual = int(a["seats"])
+        view = views["aircraft"].get(icao_type)
+        seat_actual: Optional[int] = views["seats"].get(icao_type)
+        if view:
+            lookups["aircraft"] = dict(view)
         else:
             # Explicitly indicate that this ICAO type was not found in the dataset
             lookups["aircraft"] = {
@@ -560,59 +996,21 @@ def enrich_with_catalogs(row: Dict[str, Any], cats: Dict[str, Dict[str, dict]])
     al_icao = _clean_str(row.get("airline_icao"))
     airline = None
     if al_icao:
-        airline = cats.get("airlines_by_icao", {}).get(al_icao)
+        airline = views["airlines_by_icao"].get(al_icao)
     if not airline:
-        airline = _airline_from_flight_no(_clean_str(row.get("callsign")), cats)
+        pref = _flight_no_prefix(row.get("callsign"))
+        if pref:
+            airline = views["airlines_by_iata"].get(pref)
     if airline:
-        lookups["airline"] = {
-            "icao": airline.get("icao"),
-            "iata": airline.get("iata"),
-            "name": airline.get("name"),
-            "callsign": airline.get("callsign"),
-            "country_code": airline.get("country_code"),
-            "country_name": airline.get("country_name"),
-        }
+        lookups["airline"] = dict(airline)
 
-    # Origin/Destination airports (IATA)
-    def airport_info(iata_code: Optional[str]) -> Optional[dict]:
-        i = _clean_str(iata_code)
-        if not i:
-            return None
-        a = cats.get("airports", {}).get(i)
-        if not a:
-            return None
-        return {
-            "iata": a.get("iata"),
-            "name": a.get("name"),
-            "city": a.get("city"),
-            "region": a.get("region"),
-            "country_code": a.get("country_code"),
-            "country_name": a.get("country_name"),
-            "lat": a.get("lat"),
-            "lon": a.get("lon"),
-            "elevation_ft": a.get("elevation_ft"),
-        }
-
-    ori = airport_info(row.get("origin_iata"))
-    dst = airport_info(row.get("destination_iata"))
+    # Origin/Destination airports (IATA), country name already filled from countries
+    ori = views["airports"].get(_clean_str(row.get("origin_iata")))
+    dst = views["airports"].get(_clean_str(row.get("destination_iata")))
     if ori:
-        lookups["origin_airport"] = ori
+        lookups["origin_airport"] = dict(ori)
     if dst:
-        lookups["destination_airport"] = dst
-
-    # Country by code (fallback if not present via airport)
-    if ori and not ori.get("country_name"):
-        cc = ori.get("country_code")
-        if cc:
-            c = cats.get("countries", {}).get(cc)
-            if c:
-                ori["country_name"] = c.get("name")
-    if dst and not dst.get("country_name"):
-        cc = dst.get("country_code")
-        if cc:
-            c = cats.get("countries", {}).get(cc)
-            if c:
-                dst["country_name"] = c.get("name")
+        lookups["destination_airport"] = dict(dst)
 
     if lookups:
         out["lookups"] = lookups
@@ -698,14 +1096,23 @@ def _country_flag_fields(aircraft_lookups: Dict) -> Dict[str, str]:
     return out
 
 
+MIL_REFRESH_RETRY_SEC = 60
+
+
 class MilCache:
     """Cache for military aircraft detection using ADSB.lol /v2/mil endpoint"""
 
-    def __init__(self, cache_path: str, ttl: int = 3600):  # 1 hour cache for military database
+    def __init__(self, cache_path: str, ttl: int = 3600,  # 1 hour cache for military database
+                 session: Optional[requests.Session] = None):
         self.cache_path = cache_path
         self.ttl = ttl
+        self.http = session or build_http_session()
         self.cache = self._load_cache()
-        self.military_hex_set = set()
+        self.military_hex_set = frozenset()
+        # Expired databases are refreshed off the pipeline thread, one refresh at a time, on a
+        # daemon thread so an in-flight refresh never holds up interpreter exit (e.g. after Ctrl-C)
+        self._refresh_thread = None
+        self._next_refresh_attempt = 0.0
         self._load_military_database()
 
     def _load_cache(self) -> Dict:
@@ -721,8 +1128,7 @@ class MilCache:
     def _save_cache(self):
         """Save cache to file"""
         os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
-        with open(self.cache_path, 'w') as f:
-            json.dump(self.cache, f, indent=2)
+        _write_json(self.cache_path, self.cache)
 
     def _load_military_database(self):
         """Load military aircraft database from ADSB.lol API"""
@@ -733,7 +1139,7 @@ class MilCache:
         cache_age_hours = (now - last_update) / 3600
 
         if now - last_update < self.ttl and '_military_hex_list' in self.cache:
-            self.military_hex_set = set(self.cache['_military_hex_list'])
+            self.military_hex_set = frozenset(h.upper() for h in self.cache['_military_hex_list'])
             count = len(self.military_hex_set)
             print(f"📡 Using cached military database: {count} aircraft (age: {cache_age_hours:.1f}h)")
             return
@@ -742,9 +1148,9 @@ class MilCache:
         try:
             print(f"📡 Fetching fresh military database from ADSB.lol...")
             url = f"{ADSB_API_BASE}/v2/mil"
-            response = requests.get(url, timeout=10)
+            response = self.http.get(url, timeout=10)
             if response.status_code == 200:
-                data = response.json()
+                data = _response_json(response)
                 military_aircraft = data.get('ac', [])
 
                 # Extract hex codes from military aircraft
@@ -755,7 +1161,7 @@ class MilCache:
                         military_hex_codes.append(hex_code.upper())
 
                 # Update cache and memory
-                self.military_hex_set = set(military_hex_codes)
+                self.military_hex_set = frozenset(military_hex_codes)
                 self.cache['_military_hex_list'] = military_hex_codes
                 self.cache['_military_db_update'] = now
                 self.cache['_military_db_count'] = len(military_hex_codes)
@@ -775,7 +1181,7 @@ class MilCache:
             print(f"⚠️  Failed to fetch military database: {e}")
             # Use cached data if available
             if '_military_hex_list' in self.cache:
-                self.military_hex_set = set(self.cache['_military_hex_list'])
+                self.military_hex_set = frozenset(h.upper() for h in self.cache['_military_hex_list'])
                 count = len(self.military_hex_set)
                 print(f"📡 Using stale cached military database: {count} aircraft (age: {cache_age_hours:.1f}h)")
 
@@ -806,20 +1212,43 @@ class MilCache:
 
         hex_upper = hex_code.upper()
 
-        # Refresh military database if needed
+        # Refresh military database in the background if needed; answer from the current set
         now = time.time()
         last_update = self.cache.get('_military_db_update', 0)
         if now - last_update >= self.ttl:
-            self._load_military_database()
+            self._schedule_refresh(now)
 
         # Check if hex is in military database
         return hex_upper in self.military_hex_set
 
+    def military_hexes(self) -> frozenset:
+        """Current upper-case military hex set; schedules a background refresh when expired"""
+        now = time.time()
+        if now - self.cache.get('_military_db_update', 0) >= self.ttl:
+            self._schedule_refresh(now)
+        return self.military_hex_set
+
+    def _schedule_refresh(self, now: float):
+        """Queue one background reload of the military database (stale-while-revalidate)"""
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        if now < self._next_refresh_attempt:
+            return
+        # A failed fetch leaves the timestamp stale; don't retry on every lookup
+        self._next_refresh_attempt = now + MIL_REFRESH_RETRY_SEC
+        self._refresh_thread = threading.Thread(target=self._load_military_database,
+                                                name="milcache-refresh", daemon=True)
+        self._refresh_thread.start()
+
     def get_military_count(self) -> int:
         """Get count of military aircraft in database"""
         return self.cache.get('_military_db_count', 0)
 
 
+# Provider-row keys never copied onto the merged aircraft record
+_MERGE_SKIP = frozenset({"provider"})
+
+
 class AirTrackerComplete:
     """Complete aircraft tracking pipeline in a single class"""
 
@@ -828,10 +1257,15 @@ class AirTrackerComplete:
         self.config = self._load_config(config, custom_env_file)
         self.mqtt_client = None
         self.setup_logging()
+        # One pooled session shared by every provider, MIL and Zipline call
+        self.http = build_http_session()
         self.mil_cache = MilCache(
             cache_path=str(Path.cwd() / 'data' / 'mil_cache.json'),
-            ttl=21600
+            ttl=21600,
+            session=self.http
         )
+        # Per-cycle snapshot of the military hex set used by the provider fetchers
+        self._mil_hexes = self.mil_cache.military_hex_set
         self.stats = {
             'runs': 0,
             'successful_publishes': 0,
@@ -840,7 +1274,9 @@ class AirTrackerComplete:
         }
 
         # Initialize image processor for Zipline uploads
-        self.image_processor = AircraftImageProcessor(self.config)
+        self.image_processor = AircraftImageProcessor(self.config, session=self.http)
+        # JetPhotos/FR24 scrapes for the nearest aircraft run here, overlapping enrichment
+        self._media_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="media")
 
     def _load_config(self, override_config: Optional[Dict] = None, custom_env_file: Optional[str] = None) -> Dict:
         """Load configuration from environment variables and overrides"""
@@ -930,11 +1366,17 @@ class AirTrackerComplete:
                     self.config['mqtt_pass']
                 )
 
+            # Don't throttle QoS 1 publishes on PUBACKs; 0 = unbounded outgoing queue
+            self.mqtt_client.max_inflight_messages_set(MQTT_MAX_INFLIGHT)
+            self.mqtt_client.max_queued_messages_set(0)
+
             self.mqtt_client.connect(
                 self.config['mqtt_host'],
                 self.config['mqtt_port'],
                 60
             )
+            # One background network loop writes publishes and keeps the connection alive
+            self.mqtt_client.loop_start()
 
             self.logger.info(f"✅ Connected to MQTT broker: {self.config['mqtt_host']}:{self.config['mqtt_port']}")
             return True
@@ -943,7 +1385,14 @@ class AirTrackerComplete:
             self.logger.error(f"❌ MQTT connection failed: {e}")
             return False
 
-    def publish_mqtt(self, topic: str, payload: str, retain: bool = True) -> bool:
+    def close_mqtt(self):
+        """Flush queued publishes, disconnect and stop the network loop"""
+        if self.mqtt_client:
+            self.mqtt_client.disconnect()
+            self.mqtt_client.loop_stop()
+            self.logger.info("📡 MQTT disconnected")
+
+    def publish_mqtt(self, topic: str, payload: Union[str, bytes], retain: bool = True, qos: int = 0) -> bool:
         """Publish message to MQTT"""
         try:
             if not self.mqtt_client:
@@ -951,7 +1400,7 @@ class AirTrackerComplete:
                     return False
 
             full_topic = f"{self.config['mqtt_prefix']}/{topic}"
-            result = self.mqtt_client.publish(full_topic, payload, retain=retain)
+            result = self.mqtt_client.publish(full_topic, payload, qos=qos, retain=retain)
 
             if result.rc == 0:
                 self.logger.debug(f"📤 Published to {full_topic}: {len(payload)} bytes")
@@ -964,7 +1413,7 @@ class AirTrackerComplete:
             self.logger.error(f"❌ MQTT publish error: {e}")
             return False
 
-    def publish_mqtt_raw(self, full_topic: str, payload: str, retain: bool = True) -> bool:
+    def publish_mqtt_raw(self, full_topic: str, payload: Union[str, bytes], retain: bool = True) -> bool:
         """Publish message to MQTT with full topic path (no prefix)"""
         try:
             if not self.mqtt_client:
@@ -996,7 +1445,8 @@ class AirTrackerComplete:
             # Add OAuth if configured
             if self.config['osk_client_id'] and self.config['osk_client_secret']:
                 try:
-                    token = get_opensky_token(self.config['osk_client_id'], self.config['osk_client_secret'])
+                    token = get_opensky_token(self.config['osk_client_id'], self.config['osk_client_secret'],
+                                              session=self.http)
                     headers["Authorization"] = f"Bearer {token}"
                 except Exception as e:
                     self.logger.warning(f"⚠️  OpenSky OAuth failed: {e}, falling back to anonymous")
@@ -1007,36 +1457,41 @@ class AirTrackerComplete:
                 "lomin": f"{w:.6f}", "lomax": f"{east:.6f}"
             }
 
-            response = requests.get(url, params=params, headers=headers, timeout=TIMEOUT)
+            response = self.http.get(url, params=params, headers=headers, timeout=TIMEOUT)
             response.raise_for_status()
-            data = response.json()
+            data = _response_json(response)
 
             # Normalize OpenSky data
             aircraft = []
             for state in (data.get("states") or []):
-                if len(state) < 8:
+                n_fields = len(state)
+                if n_fields < 8:
                     continue
+                if n_fields < _OSK_STATE_MIN_LEN:
+                    state = state + [None] * (_OSK_STATE_MIN_LEN - n_fields)
+
+                (hex_code, callsign, origin_country, position_ts, last_ts, lon, lat,
+                 alt_7, on_ground, velocity, track, vertical_rate, alt_13) = _OSK_GET(state)
 
                 # Get altitude (prefer baro, fallback to geometric)
-                alt_m = state[13] if len(state) > 13 and state[13] is not None else (state[7] if len(state) > 7 else None)
+                alt_m = alt_13 if alt_13 is not None else alt_7
 
-                hex_code = state[0] if len(state) > 0 else ""
-                is_mil = self.mil_cache.check_hex(hex_code) if hex_code else False
+                is_mil = hex_code.upper() in self._mil_hexes if hex_code else False
 
                 aircraft.append({
                     "provider": "opensky",
                     "hex": hex_code,
-                    "callsign": (state[1] or "").strip() if len(state) > 1 and state[1] else "",
-                    "origin_country": state[2] if len(state) > 2 else "",
-                    "latitude": state[6] if len(state) > 6 else None,
-                    "longitude": state[5] if len(state) > 5 else None,
-                    "altitude_ft": int(alt_m * 3.28084) if isinstance(alt_m, (int, float)) else None,
-                    "on_ground": state[8] if len(state) > 8 else None,
-                    "ground_speed_kt": int(state[9] * 1.94384) if len(state) > 9 and isinstance(state[9], (int, float)) else None,
-                    "track_deg": state[10] if len(state) > 10 else None,
-                    "vertical_rate_fpm": int(state[11] * 196.85) if len(state) > 11 and isinstance(state[11], (int, float)) else None,
-                    "position_timestamp": state[3] if len(state) > 3 else None,
-                    "last_timestamp": state[4] if len(state) > 4 else None,
+                    "callsign": callsign.strip() if callsign else "",
+                    "origin_country": origin_country,
+                    "latitude": lat,
+                    "longitude": lon,
+                    "altitude_ft": int(alt_m * _M_TO_FT) if alt_m is not None else None,
+                    "on_ground": on_ground,
+                    "ground_speed_kt": int(velocity * _MS_TO_KT) if velocity is not None else None,
+                    "track_deg": track,
+                    "vertical_rate_fpm": int(vertical_rate * _MS_TO_FPM) if vertical_rate is not None else None,
+                    "position_timestamp": position_ts,
+                    "last_timestamp": last_ts,
                     "is_military": is_mil,
                 })
 
@@ -1054,14 +1509,14 @@ class AirTrackerComplete:
 
         try:
             url = f"{ADSB_API_BASE}/v2/point/{self.config['lat']}/{self.config['lon']}/{self.config['radius_nm']}"
-            response = requests.get(url, timeout=TIMEOUT)
+            response = self.http.get(url, timeout=TIMEOUT)
             response.raise_for_status()
-            data = response.json()
+            data = _response_json(response)
 
             aircraft = []
             for ac in (data.get("ac") or []):
                 hex_code = ac.get("hex", "")
-                is_mil = self.mil_cache.check_hex(hex_code) if hex_code else False
+                is_mil = hex_code.upper() in self._mil_hexes if hex_code else False
 
                 aircraft.append({
                     "provider": "adsb_lol",
@@ -1103,9 +1558,9 @@ class AirTrackerComplete:
             }
 
             headers = {"User-Agent": UA_DEFAULT}
-            response = requests.get(url, params=params, headers=headers, timeout=TIMEOUT)
+            response = self.http.get(url, params=params, headers=headers, timeout=TIMEOUT)
             response.raise_for_status()
-            data = response.json()
+            data = _response_json(response)
 
             aircraft = []
             for key, value in data.items():
@@ -1113,7 +1568,7 @@ class AirTrackerComplete:
                     continue
 
                 hex_code = value[0] if len(value) > 0 else ""
-                is_mil = self.mil_cache.check_hex(hex_code) if hex_code else False
+                is_mil = hex_code.upper() in self._mil_hexes if hex_code else False
 
                 aircraft.append({
                     "provider": "fr24",
@@ -1148,11 +1603,16 @@ class AirTrackerComplete:
         self.logger.info(f"🛩️  Fetching aircraft data around {self.config['lat']}, {self.config['lon']}")
 
         all_aircraft = []
+        self._mil_hexes = self.mil_cache.military_hexes()
 
-        # Fetch from all providers
-        opensky_data = self.fetch_opensky()
-        adsb_data = self.fetch_adsb_lol()
-        fr24_data = self.fetch_fr24()
+        # Fetch from all providers concurrently: latency is the slowest provider, not the sum
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix="provider") as pool:
+            opensky_future = pool.submit(self.fetch_opensky)
+            adsb_future = pool.submit(self.fetch_adsb_lol)
+            fr24_future = pool.submit(self.fetch_fr24)
+        opensky_data = opensky_future.result()
+        adsb_data = adsb_future.result()
+        fr24_data = fr24_future.result()
 
         all_aircraft.extend(opensky_data)
         all_aircraft.extend(adsb_data)
@@ -1183,6 +1643,32 @@ class AirTrackerComplete:
         self.logger.info(f"✅ Retrieved {len(all_aircraft)} aircraft from providers")
         return all_aircraft
 
+    def _lookup_aircraft_info(self, reg: str) -> Dict:
+        """Scrape JetPhotos photos and FR24 flight history for a registration (media pool worker)"""
+        here = os.path.dirname(os.path.abspath(__file__))
+        parent_dir = os.path.dirname(here)
+        producer_dir = os.path.join(parent_dir, "producer")
+        if producer_dir not in sys.path:
+            sys.path.insert(0, producer_dir)
+
+        import planelookerupper
+
+        # get_aircraft_info keeps its own registration-keyed result cache (10 min TTL, error-free
+        # results only), so a nearest aircraft that lingers over several polls isn't re-scraped
+        return planelookerupper.get_aircraft_info(
+            registration=reg,
+            photos=4,  # Get up to 4 photos
+            flights=5  # Get up to 5 recent flights
+        )
+
+    def _submit_media_lookup(self, reg: Optional[str], futures: Dict[str, Any]):
+        """Start the media lookup for reg once per cycle; returns its future (None without a reg)"""
+        if not reg:
+            return None
+        if reg not in futures:
+            futures[reg] = self._media_pool.submit(self._lookup_aircraft_info, reg)
+        return futures[reg]
+
     def merge_aircraft_data(self, aircraft_list: List[Dict]) -> Dict:
         """Merge aircraft data by hex code and find nearest"""
         # Load enrichment catalogs
@@ -1206,65 +1692,57 @@ class AirTrackerComplete:
             if not hex_code:
                 continue
 
-            if hex_code not in by_hex:
-                by_hex[hex_code] = {
+            existing = by_hex.get(hex_code)
+            if existing is None:
+                existing = by_hex[hex_code] = {
                     "hex": hex_code,
                     "sources": [],
                     "is_military": False,
                 }
 
-            by_hex[hex_code]["sources"].append(aircraft["provider"])
+            existing["sources"].append(aircraft["provider"])
 
             # Merge fields (prefer non-null values)
             for key, value in aircraft.items():
-                if key not in ["provider"] and value is not None:
-                    if key not in by_hex[hex_code] or by_hex[hex_code][key] is None:
-                        by_hex[hex_code][key] = value
+                if value is None or key in _MERGE_SKIP:
+                    continue
+                if existing.get(key) is None:
+                    existing[key] = value
 
             # Handle military flag
             if aircraft.get("is_military"):
-                by_hex[hex_code]["is_military"] = True
+                existing["is_military"] = True
 
         # Calculate distances, enrich, and find nearest
         merged_aircraft = []
         nearest_aircraft = None
-        nearest_distance = float('inf')
-
-        for aircraft in by_hex.values():
-            lat = aircraft.get("latitude")
-            lon = aircraft.get("longitude")
 
-            if lat is not None and lon is not None:
-                # Calculate distance using haversine formula
-                lat1, lon1 = math.radians(self.config['lat']), math.radians(self.config['lon'])
-                lat2, lon2 = math.radians(lat), math.radians(lon)
-
-                dlat = lat2 - lat1
-                dlon = lon2 - lon1
-                a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-                c = 2 * math.asin(math.sqrt(a))
-                distance_nm = 3440.065 * c  # Earth radius in nautical miles
-
-                aircraft["distance_nm"] = round(distance_nm, 3)
+        # Haversine distance and bearing for every positioned aircraft in one batch
+        positioned = [a for a in by_hex.values()
+                      if a.get("latitude") is not None and a.get("longitude") is not None]
+        dists, bearings = ranges_from_point(
+            self.config['lat'], self.config['lon'],
+            [a["latitude"] for a in positioned], [a["longitude"] for a in positioned]
+        )
+        for aircraft, distance_nm, bearing in zip(positioned, dists, bearings):
+            aircraft["distance_nm"] = round(distance_nm, 3)
+            aircraft["bearing_deg"] = round(bearing, 1)
 
-                # Calculate bearing
-                y = math.sin(dlon) * math.cos(lat2)
-                x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(dlon)
-                bearing = (math.degrees(math.atan2(y, x)) + 360) % 360
-                aircraft["bearing_deg"] = round(bearing, 1)
+        # Nearest = first minimum of the unrounded distances (snapshot before enrichment)
+        if positioned:
+            i = min(range(len(dists)), key=dists.__getitem__)
+            nearest_aircraft = positioned[i].copy()
 
-                # Check if nearest
-                if distance_nm < nearest_distance:
-                    nearest_distance = distance_nm
-                    nearest_aircraft = aircraft.copy()
+        # Start the nearest aircraft's media scrape now so it overlaps the enrichment pass
+        media_futures = {}
+        if nearest_aircraft:
+            self._submit_media_lookup(_clean_str(nearest_aircraft.get("registration")), media_futures)
 
+        for aircraft in by_hex.values():
             # Enrich aircraft with dataset information
             try:
-                enriched = enrich_with_catalogs(aircraft, catalogs)
-                # Add enriched fields to aircraft
-                for key in ["souls_on_board_max", "souls_on_board_max_is_estimate", "souls_on_board_max_text", "lookups"]:
-                    if key in enriched:
-                        aircraft[key] = enriched[key]
+                # Adds souls_on_board_max* and lookups directly to aircraft (no per-row copy)
+                enriched = enrich_with_catalogs(aircraft, catalogs, inplace=True)
 
                 # Add aircraft classification
                 classification = classify_aircraft(aircraft)
@@ -1306,16 +1784,7 @@ class AirTrackerComplete:
             merged_aircraft.append(aircraft)
 
         # Add ETA and remaining distance calculations for aircraft with destinations
-        def gc_distance_nm(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-            """Calculate great circle distance in nautical miles"""
-            R_nm = 3440.065  # Earth radius in nautical miles
-            lat1_rad, lat2_rad = math.radians(lat1), math.radians(lat2)
-            dlat = math.radians(lat2 - lat1)
-            dlon = math.radians(lon2 - lon1)
-            a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon/2)**2
-            c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-            return R_nm * c
-
+        airport_latlon = catalogs.get("views", {}).get("airport_latlon", {})
         for aircraft in merged_aircraft:
             try:
                 lat = aircraft.get("latitude")
@@ -1326,19 +1795,11 @@ class AirTrackerComplete:
                 if (isinstance(lat, (int, float)) and isinstance(lon, (int, float)) and
                     isinstance(spd, (int, float)) and spd > 0 and dst_iata):
 
-                    # Try to get destination airport coordinates from lookups
-                    d_lookup = aircraft.get("lookups", {}).get("destination_airport", {})
-                    d_lat = d_lookup.get("lat") if isinstance(d_lookup, dict) else None
-                    d_lon = d_lookup.get("lon") if isinstance(d_lookup, dict) else None
-
-                    # Fallback to catalog lookup if not in aircraft lookups
-                    if not (isinstance(d_lat, (int, float)) and isinstance(d_lon, (int, float))):
-                        ap = catalogs.get("airports", {}).get(dst_iata, {})
-                        d_lat = ap.get("lat")
-                        d_lon = ap.get("lon")
-
-                    if isinstance(d_lat, (int, float)) and isinstance(d_lon, (int, float)):
-                        rem_nm = gc_distance_nm(float(lat), float(lon), float(d_lat), float(d_lon))
+                    # Destination coordinates from the per-catalog airport table
+                    coords = airport_latlon.get(dst_iata)
+                    if coords:
+                        d_lat, d_lon = coords
+                        rem_nm = gc_distance_nm(float(lat), float(lon), d_lat, d_lon)
                         aircraft["remaining_nm"] = round(rem_nm, 1)
                         aircraft["eta_min"] = round((rem_nm / float(spd)) * 60.0, 1)
             except Exception as e:
@@ -1381,6 +1842,9 @@ class AirTrackerComplete:
             # Only commercial exists
             nearest_interesting = nearest_commercial
 
+        # (image_url, registration, media dict, label) uploaded together once both picks are built
+        image_jobs = []
+
         # Enrich nearest aircraft with additional details
         enriched_nearest = {}
         if nearest_aircraft:
@@ -1429,25 +1893,13 @@ class AirTrackerComplete:
             try:
                 reg = _clean_str(enriched_nearest.get("registration"))
                 if reg:
-                    # Try to import planelookerupper for media scraping
+                    # planelookerupper media scrape (shared with the other nearest pick when regs match)
                     try:
-                        here = os.path.dirname(os.path.abspath(__file__))
-                        parent_dir = os.path.dirname(here)
-                        producer_dir = os.path.join(parent_dir, "producer")
-                        if producer_dir not in sys.path:
-                            sys.path.insert(0, producer_dir)
-
-                        import planelookerupper
-
                         if self.config.get('log_level') == 'DEBUG':
                             print(f"🖼️  Fetching media for nearest aircraft: {reg}")
 
                         # Get aircraft photos and flight history
-                        info = planelookerupper.get_aircraft_info(
-                            registration=reg,
-                            photos=4,  # Get up to 4 photos
-                            flights=5  # Get up to 5 recent flights
-                        )
+                        info = self._submit_media_lookup(reg, media_futures).result(timeout=MEDIA_LOOKUP_TIMEOUT)
 
                         media = {}
                         history = []
@@ -1462,19 +1914,9 @@ class AirTrackerComplete:
                                 plane_image_url = first.get("Image") or first.get("Thumbnail")
                                 media["plane_image"] = plane_image_url
 
-                                # Process image with Zipline upload (original + BMP conversion)
+                                # Queue Zipline upload (original + BMP conversion) for this cycle's image batch
                                 if plane_image_url and hasattr(self, 'image_processor'):
-                                    try:
-                                        zipline_urls = self.image_processor.process_aircraft_image(
-                                            plane_image_url, reg
-                                        )
-                                        if zipline_urls:
-                                            media.update(zipline_urls)
-                                            if self.config.get('log_level') == 'DEBUG':
-                                                print(f"✅ Added Zipline URLs for nearest aircraft {reg}")
-                                    except Exception as e:
-                                        if self.config.get('log_level') == 'DEBUG':
-                                            print(f"⚠️  Zipline processing failed for nearest aircraft {reg}: {e}")
+                                    image_jobs.append((plane_image_url, reg, media, "nearest aircraft"))
 
                                 # Collect thumbnails
                                 thumbs = []
@@ -1596,25 +2038,13 @@ class AirTrackerComplete:
             try:
                 reg = _clean_str(enriched_nearest_commercial.get("registration"))
                 if reg:
-                    # Try to import planelookerupper for media scraping
+                    # planelookerupper media scrape (shared with the other nearest pick when regs match)
                     try:
-                        here = os.path.dirname(os.path.abspath(__file__))
-                        parent_dir = os.path.dirname(here)
-                        producer_dir = os.path.join(parent_dir, "producer")
-                        if producer_dir not in sys.path:
-                            sys.path.insert(0, producer_dir)
-
-                        import planelookerupper
-
                         if self.config.get('log_level') == 'DEBUG':
                             print(f"🖼️  Fetching media for nearest commercial aircraft: {reg}")
 
                         # Get aircraft photos and flight history
-                        info = planelookerupper.get_aircraft_info(
-                            registration=reg,
-                            photos=4,  # Get up to 4 photos
-                            flights=5  # Get up to 5 recent flights
-                        )
+                        info = self._submit_media_lookup(reg, media_futures).result(timeout=MEDIA_LOOKUP_TIMEOUT)
 
                         media = {}
                         history = []
@@ -1629,19 +2059,9 @@ class AirTrackerComplete:
                                 plane_image_url = first.get("Image") or first.get("Thumbnail")
                                 media["plane_image"] = plane_image_url
 
-                                # Process image with Zipline upload (original + BMP conversion)
+                                # Queue Zipline upload (original + BMP conversion) for this cycle's image batch
                                 if plane_image_url and hasattr(self, 'image_processor'):
-                                    try:
-                                        zipline_urls = self.image_processor.process_aircraft_image(
-                                            plane_image_url, reg
-                                        )
-                                        if zipline_urls:
-                                            media.update(zipline_urls)
-                                            if self.config.get('log_level') == 'DEBUG':
-                                                print(f"✅ Added Zipline URLs for nearest commercial aircraft {reg}")
-                                    except Exception as e:
-                                        if self.config.get('log_level') == 'DEBUG':
-                                            print(f"⚠️  Zipline processing failed for nearest commercial aircraft {reg}: {e}")
+                                    image_jobs.append((plane_image_url, reg, media, "nearest commercial aircraft"))
 
                                 # Collect thumbnails
                                 thumbs = []
@@ -1724,6 +2144,21 @@ class AirTrackerComplete:
                 if enriched_nearest_commercial.get(key) is None:
                     enriched_nearest_commercial[key] = default_value
 
+        # Zipline uploads for the nearest picks in one batch; media dicts are already attached
+        if image_jobs:
+            try:
+                results = self.image_processor.process_aircraft_images(
+                    [(url, reg) for url, reg, _, _ in image_jobs]
+                )
+                for (_, reg, media, label), zipline_urls in zip(image_jobs, results):
+                    if zipline_urls:
+                        media.update(zipline_urls)
+                        if self.config.get('log_level') == 'DEBUG':
+                            print(f"✅ Added Zipline URLs for {label} {reg}")
+            except Exception as e:
+                if self.config.get('log_level') == 'DEBUG':
+                    print(f"⚠️  Zipline processing failed: {e}")
+
         # Set nearest_commercial to "NONE" if no commercial aircraft found
         if not enriched_nearest_commercial:
             enriched_nearest_commercial = "NONE"
@@ -1812,7 +2247,7 @@ class AirTrackerComplete:
                     config["unit_of_measurement"] = entity["unit_of_measurement"]
 
                 discovery_topic = f"{discovery_prefix}/{entity['type']}/{prefix}/{entity['id']}/config"
-                config_json = json.dumps(config, separators=(',', ':'))
+                config_json = _dumps(config)
 
                 if not self.publish_mqtt_raw(discovery_topic, config_json, retain=True):
                     self.logger.error(f"Failed to publish HA discovery config for {entity['id']}")
@@ -1904,15 +2339,16 @@ class AirTrackerComplete:
 
             # Publish nearest aircraft
             if data.get('nearest'):
-                nearest_json = json.dumps(data['nearest'], separators=(',', ':'))
-                if self.publish_mqtt('nearest', nearest_json):
+                nearest_json = _dumps(data['nearest'])
+                # QoS 1 for the display-driving topic; the high-rate topics stay at QoS 0
+                if self.publish_mqtt('nearest', nearest_json, qos=1):
                     self.stats['successful_publishes'] += 1
                 else:
                     success = False
 
             # Publish all planes data (optional, controlled by config)
             if self.config.get('mqtt_publish_all_planes') and data.get('planes'):
-                planes_json = json.dumps(data['planes'], separators=(',', ':'))
+                planes_json = _dumps(data['planes'])
                 if self.publish_mqtt('planes', planes_json):
                     self.stats['successful_publishes'] += 1
                     if self.config.get('log_level') == 'DEBUG':
@@ -1922,7 +2358,7 @@ class AirTrackerComplete:
 
             # Publish nearest commercial/military aircraft (optional, controlled by config)
             if self.config.get('mqtt_publish_nearest_commercial') and data.get('nearest_commercial'):
-                nearest_commercial_json = json.dumps(data['nearest_commercial'], separators=(',', ':'))
+                nearest_commercial_json = _dumps(data['nearest_commercial'])
                 if self.publish_mqtt('nearest_commercial', nearest_commercial_json):
                     self.stats['successful_publishes'] += 1
                     if self.config.get('log_level') == 'DEBUG':
@@ -1943,7 +2379,7 @@ class AirTrackerComplete:
                 'aircraft_count': len(data.get('planes', [])),
                 'nearest_aircraft': data.get('nearest', {}).get('callsign', 'None')
             }
-            stats_json = json.dumps(stats_data, separators=(',', ':'))
+            stats_json = _dumps(stats_data)
             self.publish_mqtt('stats', stats_json)
 
             return success
@@ -2028,6 +2464,7 @@ class AirTrackerComplete:
         try:
             self.logger.info("🔄 Starting AirTracker cycle")
             self.stats['runs'] += 1
+            self.image_processor.start_cycle()
 
             # Fetch raw data
             aircraft_data = self.fetch_aircraft_data()
@@ -2040,8 +2477,7 @@ class AirTrackerComplete:
             # Save to file if configured
             if self.config['write_json_path']:
                 os.makedirs(os.path.dirname(self.config['write_json_path']), exist_ok=True)
-                with open(self.config['write_json_path'], 'w') as f:
-                    json.dump(processed_data, f, indent=2)
+                _write_json(self.config['write_json_path'], processed_data)
 
             # Publish to MQTT
             if self.publish_data(processed_data):
@@ -2101,9 +2537,7 @@ class AirTrackerComplete:
             self.logger.error(f"❌ Continuous loop failed: {e}")
             raise
         finally:
-            if self.mqtt_client:
-                self.mqtt_client.disconnect()
-                self.logger.info("📡 MQTT disconnected")
+            self.close_mqtt()
 
 
 def main():
@@ -2184,6 +2618,7 @@ Examples:
         print("🧪 Testing MQTT connection...")
         if tracker.setup_mqtt():
             print("✅ MQTT connection successful")
+            tracker.close_mqtt()
             sys.exit(0)
         else:
             print("❌ MQTT connection failed")
@@ -2197,6 +2632,7 @@ Examples:
         # Default: single operation (exit after one cycle)
         print("🔄 Running single cycle...")
         success = tracker.run_single_cycle()
+        tracker.close_mqtt()  # the loop thread must flush queued publishes before exit
         sys.exit(0 if success else 1)
 
 
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Offline tests for airtracker_complete lookup tables and the raw BMP writer.
+
+Run with: pytest test_airtracker_complete.py
+"""
+import io
+
+import pytest
+
+pytest.importorskip("paho.mqtt.client")
+pytest.importorskip("requests")
+pytest.importorskip("dotenv")
+pytest.importorskip("PIL")
+
+from PIL import Image
+
+import airtracker_complete as at
+
+
+@pytest.mark.parametrize("flight_no,prefix", [
+    ("BA123", "BA"),       # 2-letter IATA code, not "BA1"
+    ("UA1", "UA"),
+    ("U2123", "U2"),       # alphanumeric IATA code
+    ("UAL123", "UAL"),     # ICAO-style 3-letter prefix
+    ("BAW123A", "BAW"),    # operational suffix letter
+])
+def test_flight_no_prefix(flight_no, prefix):
+    assert at._PREFIX_RE.match(flight_no)
+    assert at._flight_no_prefix(flight_no) == prefix
+
+
+@pytest.mark.parametrize("flight_no", [None, "", "B", "BA", "ba123", "N-123", "BA12345X9"])
+def test_flight_no_prefix_rejects(flight_no):
+    assert at._flight_no_prefix(flight_no) is None
+
+
+def test_airline_from_flight_no_uses_prefix():
+    cats = {"airlines_by_iata": {"BA": {"iata": "BA", "name": "British Airways"}}}
+    assert at._airline_from_flight_no("BA123", cats)["name"] == "British Airways"
+    assert at._airline_from_flight_no("XX123", cats) is None
+
+
+@pytest.mark.parametrize("icao,seats", [
+    ("B350", 11),    # exact table
+    ("C210", 6),
+    ("FA8X", 19),
+    ("BE58", 6),     # 4-character prefix
+    ("BE9L", 9),     # 3-character prefix (King Air 90)
+    ("C195", 4),     # C19 prefix, no exact entry
+    ("B738", 230),
+    ("A20N", None),
+    ("A321", 244),
+    ("E190", 146),
+    ("LJ45", 9),     # 2-character prefix
+    ("b738", 230),   # case-insensitive
+    ("ZZZZ", None),
+    ("", None),
+    (None, None),
+])
+def test_estimate_seat_max(icao, seats):
+    assert at._estimate_seat_max(icao) == seats
+
+
+def test_seat_tables_exact_entries_win_over_prefixes():
+    for icao, seats in at.SEAT_EXACT.items():
+        assert at._estimate_seat_max(icao) == seats
+
+
+@pytest.fixture
+def image_processor(tmp_path, monkeypatch):
+    # The processor keeps its URL cache under ./data; no token, so nothing is uploaded
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("ZIPLINE_TOKEN", raising=False)
+    return at.AircraftImageProcessor({})
+
+
+@pytest.mark.parametrize("size", [(200, 100), (100, 200), (96, 72), (400, 300)])
+def test_raw_bmp_matches_pillow_encoder(image_processor, size):
+    src = Image.new("RGB", size)
+    src.putdata([(x % 256, y % 256, (x * y) % 256) for y in range(size[1]) for x in range(size[0])])
+    buf = io.BytesIO()
+    src.save(buf, "PNG")
+
+    bmp = image_processor.convert_to_bmp(buf.getvalue())
+
+    w, h = at.AircraftImageProcessor.TARGET_WIDTH, at.AircraftImageProcessor.TARGET_HEIGHT
+    img = src.copy()
+    img.thumbnail((w, h), Image.Resampling.LANCZOS)
+    canvas = Image.new("RGB", (w, h), (0, 0, 0))
+    canvas.paste(img, ((w - img.width) // 2, (h - img.height) // 2))
+    ref = io.BytesIO()
+    canvas.save(ref, format="BMP")
+    assert bmp == ref.getvalue()